@@ -0,0 +1,136 @@
+# compiled_plan.py
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Tuple
+
+from cachetools import LRUCache
+
+from ..planner.schemas import GraphSpec
+from ..registry import AGENT_REGISTRY
+from .memo import content_hash
+
+COMPILED_PLAN_CACHE_SIZE = 256
+
+
+class GraphValidationError(ValueError):
+    """The graph cannot be executed; raised before any agent runs."""
+
+
+@dataclass(frozen=True)
+class CompiledPlan:
+    """
+    Integer-indexed form of a GraphSpec's shape.
+
+    Node i is `node_ids[i]`; `succs[i]` / `preds[i]` hold neighbour indices,
+    `indegree[i]` the number of predecessors, `levels` groups nodes that
+    can run together and `order` is a topological order. Only the shape
+    (node ids, agents, edges, entry nodes) is compiled: node inputs, goal
+    and settings stay on the GraphSpec.
+    """
+    key: str
+    node_ids: Tuple[str, ...]
+    agents: Tuple[str, ...]
+    agent_fns: Tuple[Callable, ...]
+    index: Dict[str, int]
+    succs: Tuple[Tuple[int, ...], ...]
+    preds: Tuple[Tuple[int, ...], ...]
+    indegree: Tuple[int, ...]
+    entry: Tuple[int, ...]
+    levels: Tuple[Tuple[int, ...], ...]
+    order: Tuple[int, ...]
+
+    def remaining(self, cost: Callable[[int], float]) -> Tuple[float, ...]:
+        """Per node: its cost plus the longest chain of work that depends on it."""
+        out = [0.0] * len(self.node_ids)
+        for i in reversed(self.order):
+            out[i] = cost(i) + max((out[s] for s in self.succs[i]), default=0.0)
+        return tuple(out)
+
+
+def structural_hash(graph: GraphSpec) -> str:
+    return content_hash(
+        sorted((node_id, node.agent) for node_id, node in graph.nodes.items()),
+        sorted(map(list, graph.edges)),
+        sorted(graph.entry_nodes),
+    )
+
+
+def _compile(graph: GraphSpec, key: str) -> CompiledPlan:
+    node_ids = tuple(sorted(graph.nodes))
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    agents = tuple(graph.nodes[node_id].agent for node_id in node_ids)
+
+    missing = sorted({a for a in agents if AGENT_REGISTRY.get(a) is None})
+    if missing:
+        raise GraphValidationError(f"Agents not implemented: {missing}")
+
+    dangling = [(src, dst) for src, dst in graph.edges if src not in index or dst not in index]
+    if dangling:
+        raise GraphValidationError(f"Edges reference unknown nodes: {dangling}")
+
+    unknown_entry = [n for n in graph.entry_nodes if n not in index]
+    if unknown_entry:
+        raise GraphValidationError(f"Unknown entry nodes: {unknown_entry}")
+
+    succs = [set() for _ in node_ids]
+    preds = [set() for _ in node_ids]
+    for src, dst in graph.edges:
+        succs[index[src]].add(index[dst])
+        preds[index[dst]].add(index[src])
+    indegree = [len(p) for p in preds]
+
+    entry = sorted({index[n] for n in graph.entry_nodes})
+    not_roots = [node_ids[i] for i in entry if indegree[i]]
+    if not_roots:
+        raise GraphValidationError(f"Entry nodes have dependencies: {not_roots}")
+
+    # Kahn's algorithm from the entry nodes, one level at a time
+    pending = list(indegree)
+    levels, order = [], []
+    level = entry
+    while level:
+        levels.append(tuple(level))
+        order.extend(level)
+        following = []
+        for i in level:
+            for s in succs[i]:
+                pending[s] -= 1
+                if pending[s] == 0:
+                    following.append(s)
+        level = sorted(following)
+
+    if len(order) < len(node_ids):
+        stuck = sorted(node_ids[i] for i in set(range(len(node_ids))) - set(order))
+        if any(pending[index[n]] == 0 for n in stuck):
+            raise GraphValidationError(f"Nodes unreachable from entry nodes: {stuck}")
+        raise GraphValidationError(f"Graph has a cycle through: {stuck}")
+
+    return CompiledPlan(
+        key=key,
+        node_ids=node_ids,
+        agents=agents,
+        agent_fns=tuple(AGENT_REGISTRY[a] for a in agents),
+        index=index,
+        succs=tuple(tuple(sorted(s)) for s in succs),
+        preds=tuple(tuple(sorted(p)) for p in preds),
+        indegree=tuple(indegree),
+        entry=tuple(entry),
+        levels=tuple(levels),
+        order=tuple(order),
+    )
+
+
+_plans: LRUCache = LRUCache(maxsize=COMPILED_PLAN_CACHE_SIZE)
+_plans_lock = threading.Lock()
+
+
+def compile_plan(graph: GraphSpec) -> CompiledPlan:
+    """Compile and validate `graph`, reusing the plan of any graph with the same shape."""
+    key = structural_hash(graph)
+    with _plans_lock:
+        plan = _plans.get(key)
+    if plan is None:
+        plan = _compile(graph, key)
+        with _plans_lock:
+            _plans[key] = plan
+    return plan
@@ -1,16 +1,221 @@
 import asyncio
-import openai
+import json
 import os
-from dotenv import load_dotenv
+from pydantic import ValidationError
 
-load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
+from core.env import load_env
+from .schemas import DeckContent, SlideContent
+from .slide_agent import parse_slides, slide_text, SlideStreamParser, PLACEHOLDER_BULLET
+from .image_agent import resolve_slide_image
+from .llm import chat_completion, stream_completion, warm_up  # noqa: F401 - warm_up is the registry hook
+from .memo import mark_degraded, run_tracked
 
+load_env()
 
-async def content_agent(input_data: dict) -> str:
+# "stream": parse slides off the token stream and start image lookups early
+# "single": wait for the full completion
+# "outline": one short call for the titles, then every slide in parallel
+# "json": JSON-mode completion validated against DeckContent; only bad slides are retried
+# "auto": "outline" for decks of CONTENT_OUTLINE_THRESHOLD slides or more, else "stream"
+CONTENT_MODE = os.getenv("CONTENT_MODE", "auto").lower()
+CONTENT_OUTLINE_THRESHOLD = int(os.getenv("CONTENT_OUTLINE_THRESHOLD", 8))
+CONTENT_CONCURRENCY = int(os.getenv("CONTENT_CONCURRENCY", 4))
+
+
+def _content_mode(num_slides: int, settings: dict) -> str:
+    # The planner may pin a mode per graph; otherwise use the env default
+    mode = (settings.get("content_mode") or CONTENT_MODE).lower()
+    if mode == "auto":
+        return "outline" if num_slides >= CONTENT_OUTLINE_THRESHOLD else "stream"
+    return mode
+
+
+def _prefetch_image(state: dict, idx: int, block: dict, goal: str) -> None:
+    """
+    Start slide `idx`'s image lookup now; image_agent awaits it later. The
+    task resolves to (image, degraded reasons) so the reasons count against
+    image_agent's result, not this node's.
+    """
+    text = slide_text(block)
+    sources = (state.get("settings") or {}).get("image_sources")
+    task = asyncio.create_task(run_tracked(resolve_slide_image(text, goal, sources)))
+    state.setdefault("image_prefetch", {})[idx] = (text, task)
+
+
+async def _stream_content(prompt: str, goal: str, state: dict, num_slides: int) -> str:
+    """
+    Stream the deck and start each slide's image lookup as soon as its block
+    closes. Tasks are left in state['image_prefetch'] as {idx: (text, task)}
+    for image_agent to await (see _prefetch_image).
+    """
+    parser = SlideStreamParser()
+    parts = []
+    closed = 0
+
+    def _schedule(blocks):
+        nonlocal closed
+        for block in blocks:
+            closed += 1
+            if closed <= num_slides:
+                _prefetch_image(state, closed, block, goal)
+
+    async for delta in stream_completion(prompt, max_tokens=1000):
+        parts.append(delta)
+        _schedule(parser.feed(delta))
+    _schedule(parser.close())
+
+    return "".join(parts).strip()
+
+
+async def _generate_outline(goal: str, research: str, num_slides: int) -> list[str]:
+    """Ask only for the slide titles; cheap enough to never truncate."""
+    prompt = f"""
+You are a content assistant.
+Plan a presentation of exactly {num_slides} slides.
+
+Guidelines:
+- Return ONLY the slide titles, one per line, numbered 1 to {num_slides}.
+- No bullets, no explanation.
+
+Goal: {goal}
+Research Points: {research}
+"""
+    text = await chat_completion(
+        prompt,
+        max_tokens=20 * num_slides + 20,
+        temperature=0.3,
+    )
+
+    return [block["title"] for block in parse_slides(text) if block["title"]][:num_slides]
+
+
+async def _outline_content(goal: str, research: str, state: dict, num_slides: int) -> str:
+    """
+    Outline first, then expand every slide concurrently (at most
+    CONTENT_CONCURRENCY at a time) and merge the results in outline order.
+    """
+    titles = await _generate_outline(goal, research, num_slides)
+    if not titles:
+        raise ValueError("Empty outline")
+
+    semaphore = asyncio.Semaphore(CONTENT_CONCURRENCY)
+
+    async def _expand(idx: int, title: str) -> dict:
+        async with semaphore:
+            block = await generate_slide_content(goal, title, research, outline=titles)
+        # Keep the planned title so slides stay distinct and in order
+        block["title"] = title
+        _prefetch_image(state, idx, block, goal)
+        return block
+
+    blocks = await asyncio.gather(*(_expand(idx, title) for idx, title in enumerate(titles, 1)))
+
+    return "\n\n".join(
+        f"{idx}. {block['title']}\n" + "\n".join(f"- {b}" for b in block["bullets"])
+        for idx, block in enumerate(blocks, 1)
+    )
+
+
+def _repair_slide(raw) -> dict | None:
+    """Cheap local fixes for common format drift before paying for a retry."""
+    if isinstance(raw, str):
+        # Model emitted the text format instead of an object
+        blocks = parse_slides(raw)
+        raw = blocks[0] if blocks else None
+    if not isinstance(raw, dict):
+        return None
+
+    bullets = raw.get("bullets") or raw.get("points") or []
+    if isinstance(bullets, str):
+        bullets = bullets.splitlines()
+    bullets = [str(b).lstrip("-•* ").strip() for b in bullets if str(b).strip()]
+
+    try:
+        return SlideContent.model_validate({
+            "title": str(raw.get("title") or raw.get("heading") or ""),
+            "bullets": bullets[:6],
+        }).model_dump()
+    except ValidationError:
+        return None
+
+
+def validate_deck(text: str) -> list[dict | None]:
+    """
+    Validate a JSON-mode completion.
+
+    Fast path is a single pydantic pass over the whole payload. Otherwise
+    slides are validated one by one and repaired locally where possible;
+    None marks a slide that has to be regenerated. Raises ValueError when
+    the payload is not a usable deck at all.
+    """
+    try:
+        return [slide.model_dump() for slide in DeckContent.model_validate_json(text).slides]
+    except ValidationError:
+        pass
+
+    data = json.loads(text)
+    raw_slides = data.get("slides") if isinstance(data, dict) else data
+    if not isinstance(raw_slides, list):
+        raise ValueError("No slides array in JSON output")
+
+    slides = []
+    for raw in raw_slides:
+        try:
+            slides.append(SlideContent.model_validate(raw).model_dump())
+        except ValidationError:
+            slides.append(_repair_slide(raw))
+    return slides
+
+
+async def _json_content(goal: str, research: str, state: dict, num_slides: int) -> dict:
+    """
+    Request the deck as JSON, validate it, and regenerate only the slides
+    that are missing or could not be repaired.
+    """
+    prompt = f"""
+You are a content assistant.
+Convert the following research points into a presentation of exactly {num_slides} slides.
+
+Return JSON only, in this shape:
+{{"slides": [{{"title": "Slide Title", "bullets": ["Bullet 1", "Bullet 2", "Bullet 3"]}}]}}
+
+Each slide must have a clear title and 3-5 concise bullet points.
+
+Goal: {goal}
+Research Points: {research}
+"""
+    text = await chat_completion(
+        prompt,
+        max_tokens=min(4000, 120 * num_slides + 100),
+        temperature=0.3,
+        response_format={"type": "json_object"},
+    )
+
+    slides = validate_deck(text)[:num_slides]
+    slides += [None] * (num_slides - len(slides))
+
+    outline = [s["title"] for s in slides if s]
+    semaphore = asyncio.Semaphore(CONTENT_CONCURRENCY)
+
+    async def _retry(idx: int) -> dict:
+        async with semaphore:
+            return await generate_slide_content(goal, f"Slide {idx}", research, outline=outline, focus=f"{goal} (slide {idx} of {num_slides})")
+
+    bad = [idx for idx, s in enumerate(slides, 1) if s is None]
+    for idx, slide in zip(bad, await asyncio.gather(*(_retry(idx) for idx in bad))):
+        slides[idx - 1] = slide
+
+    for idx, slide in enumerate(slides, 1):
+        _prefetch_image(state, idx, slide, goal)
+
+    return {"slides": slides}
+
+
+async def content_agent(input_data: dict) -> str | dict:
     """
     Converts research output into structured slide content.
     Ensures each slide has a clear title and 3–5 bullet points.
+    Returns numbered text, or {'slides': [...]} in JSON mode.
     """
 
     goal = input_data.get("goal") or "General topic"
@@ -38,24 +243,83 @@ Goal: {goal}
 Research Points: {research_output}
 """
 
-    try:
-        response = await asyncio.to_thread(
-            lambda: openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1000,
-                temperature=0.3,
-            )
-        )
+    mode = _content_mode(num_slides, state.get("settings") or {})
 
-        content = response.choices[0].message.content.strip()
+    try:
+        if mode == "json":
+            try:
+                return await _json_content(goal, research_output, state, num_slides)
+            except Exception:
+                content = await _stream_content(prompt, goal, state, num_slides)
+        elif mode == "outline":
+            try:
+                content = await _outline_content(goal, research_output, state, num_slides)
+            except Exception:
+                # One shot at the whole deck is still better than placeholders
+                content = await _stream_content(prompt, goal, state, num_slides)
+        elif mode == "stream":
+            content = await _stream_content(prompt, goal, state, num_slides)
+        else:
+            content = await chat_completion(prompt, max_tokens=1000)
 
         # Ensure output is not empty
         if not content:
+            mark_degraded("empty content")
             content = "\n".join([f"{i+1}. Slide {i+1}\n- Key concept overview" for i in range(num_slides)])
 
         return content
 
     except Exception as e:
         # Safe fallback if LLM fails
-        return "\n".join([f"{i+1}. Slide {i+1}\n- Key concept overview" for i in range(num_slides)])
\ No newline at end of file
+        mark_degraded(f"content failed: {e}")
+        return "\n".join([f"{i+1}. Slide {i+1}\n- Key concept overview" for i in range(num_slides)])
+
+
+async def generate_slide_content(
+    goal: str,
+    title: str,
+    research: str = "",
+    instructions: str | None = None,
+    outline: list[str] | None = None,
+    focus: str | None = None,
+) -> dict:
+    """
+    Generate the bullets (and possibly the title) of a single slide.
+    `outline` lists the deck's other titles so bullets do not overlap;
+    `focus` replaces the title as the prompt's subject without ever being shown.
+    Returns {'title', 'bullets'}; falls back to the given title on failure.
+    """
+    prompt = f"""
+You are a content assistant.
+Write ONE presentation slide for the deck below.
+
+Guidelines:
+- Keep the slide focused on: {focus or title}
+- Give it a clear title and 3-5 concise bullet points.
+- Format output like this:
+
+1. Slide Title
+- Bullet 1
+- Bullet 2
+- Bullet 3
+
+Goal: {goal}
+Research Points: {research or "No research data provided"}
+"""
+    if outline:
+        prompt += "Deck outline (cover only your slide): " + "; ".join(outline) + "\n"
+    if instructions:
+        prompt += f"Editor instructions: {instructions}\n"
+
+    try:
+        text = await chat_completion(prompt, max_tokens=200)
+
+        blocks = parse_slides(text)
+        if blocks and blocks[0]["bullets"]:
+            return {"title": blocks[0]["title"] or title, "bullets": blocks[0]["bullets"]}
+
+    except Exception:
+        pass
+
+    mark_degraded(f"no content for slide {title!r}")
+    return {"title": title, "bullets": [PLACEHOLDER_BULLET]}
@@ -1,9 +1,16 @@
 # executor_agent.py
+import asyncio
+import contextlib
 import logging
+import time
 from typing import Dict, Set
 
 from ..planner.schemas import GraphSpec, NodeSpec
-from ..registry import AGENT_REGISTRY
+from ..registry import NON_MEMOIZED_AGENTS
+from .compiled_plan import compile_plan
+from .latency import LatencyProfile, latency_profile, profile_key
+from .memo import NodeMemo, node_memo, run_tracked
+from .scheduler import NodeScheduler, node_scheduler, urgency_key
 
 logger = logging.getLogger(__name__)
 
@@ -13,51 +20,104 @@ class GraphExecutor:
     LangGraph-style DAG executor.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        memo: NodeMemo | None = node_memo,
+        profile: LatencyProfile = latency_profile,
+        scheduler: NodeScheduler | None = node_scheduler,
+        urgency_offset: float = 0.0,
+        refresh_memo: bool = False,
+    ):
         self.state: Dict[str, any] = {}
         self.completed_nodes: Set[str] = set()
+        self.memo = memo
+        self.profile = profile
+        self.scheduler = scheduler
+        self.urgency: Dict[str, float] = {}
+        # Added to every node's urgency key; background runs use a large one to yield slots
+        self.urgency_offset = urgency_offset
+        # Recompute memoisable nodes and overwrite their entries instead of reading them;
+        # a degraded recompute only extends the existing entry's TTL
+        self.refresh_memo = refresh_memo
 
     async def execute(self, graph: GraphSpec) -> Dict[str, any]:
         """
-        Execute the graph respecting dependencies.
+        Execute the graph respecting dependencies. Invalid graphs (unknown
+        agents, dangling edges, cycles) raise GraphValidationError before
+        any agent runs.
+        Nodes whose dependencies are met run concurrently, competing with
+        other runs for scheduler slots by remaining critical path and run age.
         """
+        # Validated, integer-indexed shape; cached across runs of the same graph shape
+        plan = compile_plan(graph)
+
         # Initialize shared state
         self.state["goal"] = graph.goal
         self.state["num_slides"] = getattr(graph, "num_slides", 14)
-
-        # Build dependency maps
-        dependencies = {node_id: set() for node_id in graph.nodes}
-        dependents = {node_id: set() for node_id in graph.nodes}
-
-        for src, dst in graph.edges:
-            dependencies[dst].add(src)
-            dependents[src].add(dst)
-
-        # Start with entry nodes
-        ready = set(graph.entry_nodes)
-
-        while ready:
-            node_id = ready.pop()
-            await self._execute_node(node_id, graph.nodes[node_id])
-
-            self.completed_nodes.add(node_id)
-
-            # Unlock dependent nodes
-            for dependent in dependents.get(node_id, []):
-                if dependencies[dependent].issubset(self.completed_nodes):
-                    ready.add(dependent)
+        self.state["settings"] = dict(graph.settings or {})
+        self.state["style"] = graph.style
+
+        # Dispatch order when slots are scarce: expected (p50) remaining work, then run age
+        run_started = time.monotonic()
+        remaining = plan.remaining(lambda i: self.profile.p50(profile_key(graph.nodes[plan.node_ids[i]])))
+        self.urgency = {plan.node_ids[i]: urgency_key(run_started, r) + self.urgency_offset for i, r in enumerate(remaining)}
+
+        pending = list(plan.indegree)
+        ready = list(plan.entry)
+        running: Dict[asyncio.Task, int] = {}
+
+        while ready or running:
+            for i in ready:
+                node_id = plan.node_ids[i]
+                upstream = {plan.node_ids[p] for p in plan.preds[i]}
+                task = asyncio.create_task(self._execute_node(node_id, graph.nodes[node_id], upstream, plan.agent_fns[i]))
+                running[task] = i
+            ready = []
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                i = running.pop(task)
+                if task.exception() is not None:
+                    for other in running:
+                        other.cancel()
+                    raise task.exception()
+
+                self.completed_nodes.add(plan.node_ids[i])
+
+                # Unlock dependent nodes
+                for dependent in plan.succs[i]:
+                    pending[dependent] -= 1
+                    if pending[dependent] == 0:
+                        ready.append(dependent)
 
         return self.state
 
-    async def _execute_node(self, node_id: str, node: NodeSpec):
-        if node.agent not in AGENT_REGISTRY:
-            raise NotImplementedError(f"Agent {node.agent} not implemented")
-
-        agent_fn = AGENT_REGISTRY[node.agent]
-
-        if agent_fn is None:
-            logger.error("Agent %s is registered but implementation is None", node.agent)
-            raise NotImplementedError(f"Agent {node.agent} implementation missing")
+    def _memo_key(self, node: NodeSpec, upstream: Set[str]) -> str:
+        """Hash of everything the node can observe: its input, goal, settings and upstream outputs."""
+        return self.memo.key(
+            node.agent,
+            node.input,
+            self.state.get("goal"),
+            self.state.get("num_slides"),
+            self.state.get("settings"),
+            {dep: self.state.get(dep) for dep in sorted(upstream)},
+        )
+
+    def _slot(self, node_id: str):
+        if self.scheduler is None:
+            return contextlib.nullcontext()
+        return self.scheduler.slot(self.urgency.get(node_id, time.monotonic()))
+
+    async def _execute_node(self, node_id: str, node: NodeSpec, upstream: Set[str], agent_fn):
+
+        memo_key = None
+        if self.memo is not None and node.agent not in NON_MEMOIZED_AGENTS:
+            memo_key = self._memo_key(node, upstream)
+            found, cached = (False, None) if self.refresh_memo else self.memo.get(memo_key)
+            if found:
+                self.state[node_id] = cached
+                logger.debug("Node %s served from memo (%s)", node_id, memo_key[:12])
+                return
 
         # Build input payload
         input_payload = {
@@ -69,8 +129,20 @@ class GraphExecutor:
         if node.input is not None:
             input_payload["input"] = node.input
 
-        result = await agent_fn(input_payload)
+        async with self._slot(node_id):
+            started = time.perf_counter()
+            result, degraded = await run_tracked(agent_fn(input_payload))
+            self.profile.record(profile_key(node), time.perf_counter() - started)
 
         # Store output in shared state
         self.state[node_id] = result
-        logger.debug("Node %s executed. Stored output under state[%s]", node.agent, node_id)
\ No newline at end of file
+        if memo_key is not None:
+            if not degraded:
+                self.memo.put(memo_key, result)
+            elif self.refresh_memo and self.memo.touch(memo_key):
+                # A failed refresh keeps the good entry (for longer) and continues from it
+                _, self.state[node_id] = self.memo.get(memo_key)
+                logger.info("Node %s refresh degraded (%s); kept memoised result", node_id, "; ".join(degraded))
+            else:
+                logger.info("Node %s degraded (%s); result not memoised", node_id, "; ".join(degraded))
+        logger.debug("Node %s executed. Stored output under state[%s]", node.agent, node_id)
@@ -1,19 +1,44 @@
 import os
 import asyncio
-import httpx
-import openai
-from dotenv import load_dotenv
+import contextvars
+import logging
+import re
 
-load_dotenv()
+from core.env import load_env
+from utils.quota import counts_as_failure, quota
+from utils.resilience import resilient_call
+from .image_cache import image_cache
+from .image_sources import build_image_source, IMAGE_SOURCES
+from .llm import chat_completion, warm_up as warm_up_llm
+from .memo import degraded_flags, mark_degraded, run_tracked
+from .slide_agent import content_slides, slide_text
+
+load_env()
+
+logger = logging.getLogger(__name__)
 
 UNSPLASH_ACCESS_KEY = os.getenv("UNSPLASH_ACCESS_KEY")
-openai.api_key = os.getenv("OPENAI_API_KEY")
+# Candidates fetched per cache miss (Unsplash allows up to 30)
+UNSPLASH_BATCH_SIZE = int(os.getenv("UNSPLASH_BATCH_SIZE", 10))
+# Hedging spends a second request from the small Unsplash budget, so it is opt-in
+UNSPLASH_HEDGE = os.getenv("UNSPLASH_HEDGE", "false").lower() in ("1", "true", "yes")
+
+
+# Bulk generation coalesces image-query prompts from many slides (and decks) into one call
+IMAGE_QUERY_BATCH_SIZE = int(os.getenv("IMAGE_QUERY_BATCH_SIZE", 12))
+# Seconds a prompt waits for others to join its batch
+IMAGE_QUERY_BATCH_WINDOW = float(os.getenv("IMAGE_QUERY_BATCH_WINDOW", 0.05))
+
+# Set by bulk generation to the batch's own ImageQueryBatcher; tasks created while it is set inherit it
+image_query_batcher: contextvars.ContextVar["ImageQueryBatcher | None"] = contextvars.ContextVar("image_query_batcher", default=None)
+
+_BATCH_SECTION_RE = re.compile(r"^#+\s*(\d+)\s*$", re.MULTILINE)
 
 
 # ---------------------------
 # LLM helper
 # ---------------------------
-async def generate_image_queries(slide_text: str, goal: str) -> list[str]:
+async def _generate_image_queries(slide_text: str, goal: str) -> list[str]:
     prompt = f"""
 You are an expert at selecting Unsplash image search keywords.
 
@@ -29,53 +54,188 @@ No numbering, no explanation.
 """
 
     try:
-        response = await asyncio.to_thread(
-            lambda: openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=80,
-                temperature=0.3,
-            )
-        )
+        text = await chat_completion(prompt, max_tokens=80)
 
         return [
             q.strip()
-            for q in response.choices[0].message.content.split("\n")
+            for q in text.split("\n")
             if q.strip()
         ]
 
-    except Exception:
+    except Exception as e:
+        logger.warning("Image query generation failed, using goal as query: %s", e)
+        mark_degraded(f"image queries failed: {e}")
         return [goal]
 
 
+class ImageQueryBatcher:
+    """
+    Collects image-query requests made within IMAGE_QUERY_BATCH_WINDOW (up to
+    IMAGE_QUERY_BATCH_SIZE) and answers them with a single completion.
+    Slides the combined answer misses fall back to their own call. Each bulk
+    request gets its own batcher, so different users' slides never share a
+    prompt.
+    """
+
+    def __init__(self, size: int = IMAGE_QUERY_BATCH_SIZE, window: float = IMAGE_QUERY_BATCH_WINDOW):
+        self.size = size
+        self.window = window
+        self.batches = 0
+        self._pending: list = []  # (slide_text, goal, future, submitter's degraded flags)
+        self._timer: asyncio.TimerHandle | None = None
+
+    async def submit(self, slide_text: str, goal: str) -> list[str]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((slide_text, goal, future, degraded_flags()))
+        if len(self._pending) >= self.size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        # A size flush must not leave the window timer to cut the next batch short
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self._pending = self._pending, []
+        if items:
+            asyncio.ensure_future(self._run(items))
+
+    async def _run(self, items: list) -> None:
+        self.batches += 1
+        blocks = "\n\n".join(
+            f"### {i}\nTopic: {goal}\nSlide content:\n{text}" for i, (text, goal, _, _) in enumerate(items, 1)
+        )
+        prompt = f"""
+You are an expert at selecting Unsplash image search keywords.
+
+For each numbered slide below, generate 3–5 short Unsplash search queries (2–4 words).
+Answer with the same "### <number>" heading for each slide, then ONE query per line.
+No numbering of queries, no explanation.
+
+{blocks}
+"""
+        answers: dict[int, list[str]] = {}
+        try:
+            text = await chat_completion(prompt, max_tokens=60 * len(items))
+            parts = _BATCH_SECTION_RE.split(text)
+            for number, body in zip(parts[1::2], parts[2::2]):
+                queries = [q.strip() for q in body.split("\n") if q.strip()]
+                if queries:
+                    answers[int(number)] = queries
+        except Exception as e:
+            logger.warning("Batched image query generation failed for %d slides: %s", len(items), e)
+
+        for i, (_, _, future, _) in enumerate(items, 1):
+            if not future.done() and i in answers:
+                future.set_result(answers[i])
+        missing = [item for i, item in enumerate(items, 1) if i not in answers]
+        # Fallbacks report degradation to the node that submitted the slide, not to this task
+        fallbacks = await asyncio.gather(*(
+            run_tracked(_generate_image_queries(text, goal), flags) for text, goal, _, flags in missing
+        ))
+        for (_, _, future, _), (queries, _) in zip(missing, fallbacks):
+            if not future.done():
+                future.set_result(queries)
+
+
+async def generate_image_queries(slide_text: str, goal: str) -> list[str]:
+    batcher = image_query_batcher.get()
+    if batcher is not None and batcher.size > 1:
+        return await batcher.submit(slide_text, goal)
+    return await _generate_image_queries(slide_text, goal)
+
+
 # ---------------------------
 # Unsplash helper
 # ---------------------------
 async def fetch_image_url(query: str) -> str:
+    """Next cached candidate for `query`; on a miss fetch a whole batch from Unsplash."""
+    try:
+        hit, cached = await asyncio.to_thread(image_cache.lookup, query)
+        if hit:
+            return cached
+    except Exception as e:
+        logger.warning("Image cache unavailable: %s", e)
+
+    import httpx
+
     async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                "https://api.unsplash.com/photos/random",
-                params={
-                    "query": query,
-                    "client_id": UNSPLASH_ACCESS_KEY,
-                    "orientation": "landscape",
-                    "count": 1,
-                },
-                timeout=10,
-            )
 
+        async def _attempt():
+            async with quota.lease("unsplash") as lease:
+                response = await client.get(
+                    "https://api.unsplash.com/photos/random",
+                    params={
+                        "query": query,
+                        "client_id": UNSPLASH_ACCESS_KEY,
+                        "orientation": "landscape",
+                        "count": UNSPLASH_BATCH_SIZE,
+                    },
+                    timeout=10,
+                )
+                # Unsplash signals an exhausted hourly budget with 403 + zero remaining
+                if response.status_code == 429 or response.headers.get("X-Ratelimit-Remaining") == "0":
+                    lease.throttled()
+                # Server errors count against the breaker; 4xx are answers
+                if response.status_code >= 500:
+                    response.raise_for_status()
+            return response
+
+        try:
+            response = await resilient_call("unsplash:random", _attempt, hedge=UNSPLASH_HEDGE, counts_as_failure=counts_as_failure)
             data = response.json()
 
-            if isinstance(data, list) and data and "urls" in data[0]:
-                return data[0]["urls"]["regular"]
+            if not isinstance(data, list):
+                # Error payload: do not cache, the next call may succeed
+                mark_degraded(f"Unsplash error for {query!r}")
+                return None
 
-            return None
+            urls = [item["urls"]["regular"] for item in data if isinstance(item, dict) and "urls" in item]
+            try:
+                await asyncio.to_thread(image_cache.store, query, urls)
+            except Exception as e:
+                logger.warning("Image cache unavailable: %s", e)
+
+            return urls[0] if urls else None
 
-        except Exception:
+        except Exception as e:
+            logger.warning("Unsplash lookup failed for %r: %s", query, e)
+            mark_degraded(f"Unsplash lookup failed: {e}")
             return None
 
 
+# ---------------------------
+# Per-slide helper
+# ---------------------------
+_image_sources = {}
+
+
+def image_source(spec: str | None = None):
+    """Source tiers for `spec` (default IMAGE_SOURCES), built once per spec."""
+    spec = spec or IMAGE_SOURCES
+    if spec not in _image_sources:
+        _image_sources[spec] = build_image_source(spec)
+    return _image_sources[spec]
+
+
+def warm_up() -> None:
+    """Registry warm-up hook: clients plus the default tiers (and their local index)."""
+    import httpx  # noqa: F401
+
+    warm_up_llm()
+    for source in getattr(image_source(), "sources", []):
+        if getattr(source, "available", False):
+            source.index()
+
+
+async def resolve_slide_image(slide_text: str, goal: str, sources: str | None = None) -> str | None:
+    """Image for one slide: a URL or a local library path, None if no tier matches."""
+    return await image_source(sources).find(slide_text, goal)
+
+
 # ---------------------------
 # MAIN IMAGE AGENT
 # ---------------------------
@@ -83,34 +243,44 @@ async def image_agent(input_data: dict) -> dict:
     """
     LangGraph-style image agent.
     Pulls slide content from shared state.
+
+    With input {"slide": n} only slide n is resolved, so the planner can
+    fan image work out into one node per slide.
     """
 
     state = input_data.get("state", {})
     goal = input_data.get("goal", "")
+    node_input = input_data.get("input")
+    only_slide = node_input.get("slide") if isinstance(node_input, dict) else None
+    sources = (state.get("settings") or {}).get("image_sources")
 
     # ✅ IMPORTANT FIX
     slide_content = state.get("content_agent", "")
 
     num_slides = state.get("num_slides", 14)
 
-    slides = [
-        line.strip()
-        for line in slide_content.split("\n")
-        if line.strip()
-    ][:num_slides]
+    # One query per slide block (title + bullets), not per line
+    slides = content_slides(slide_content)[:num_slides]
 
-    results = {}
-
-    for idx, slide_text in enumerate(slides, 1):
-        queries = await generate_image_queries(slide_text, goal)
+    # Lookups content_agent already started while streaming, {idx: (text, task -> (image, reasons))}
+    prefetch = state.get("image_prefetch") or {}
 
-        image_url = None
-        for query in queries:
-            image_url = await fetch_image_url(query)
-            if image_url:
-                break
+    results = {}
 
+    for idx, block in enumerate(slides, 1):
+        if only_slide is not None and idx != only_slide:
+            continue
+        text = slide_text(block)
+        prefetched = prefetch.get(idx)
+        if prefetched and prefetched[0] == text:
+            try:
+                results[f"slide_{idx}"], reasons = await prefetched[1]
+                for reason in reasons:
+                    mark_degraded(reason)
+                continue
+            except Exception:
+                pass
         # store None when no valid image found
-        results[f"slide_{idx}"] = image_url
+        results[f"slide_{idx}"] = await resolve_slide_image(text, goal, sources)
 
-    return results
\ No newline at end of file
+    return results
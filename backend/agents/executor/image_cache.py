@@ -0,0 +1,188 @@
+# image_cache.py
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+IMAGE_CACHE_PATH = os.getenv("IMAGE_CACHE_PATH", "./image_cache.db")
+IMAGE_CACHE_TTL = int(os.getenv("IMAGE_CACHE_TTL", 7 * 24 * 3600))
+# Queries that returned nothing are remembered for a shorter time
+IMAGE_CACHE_NEGATIVE_TTL = int(os.getenv("IMAGE_CACHE_NEGATIVE_TTL", 3600))
+IMAGE_CACHE_MAX_QUERIES = int(os.getenv("IMAGE_CACHE_MAX_QUERIES", 5000))
+# Images resolved per slide title / goal for the offline "cache" tier; budgeted apart from queries
+IMAGE_SLIDE_CACHE_TTL = int(os.getenv("IMAGE_SLIDE_CACHE_TTL", 7 * 24 * 3600))
+IMAGE_SLIDE_CACHE_MAX_KEYS = int(os.getenv("IMAGE_SLIDE_CACHE_MAX_KEYS", 5000))
+IMAGE_SLIDE_CACHE_CANDIDATES = int(os.getenv("IMAGE_SLIDE_CACHE_CANDIDATES", 10))
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query.strip().lower())
+
+
+class ImageQueryCache:
+    """
+    Persistent query -> candidate URLs cache.
+
+    Each miss stores a whole batch of candidates; hits hand them out in
+    round-robin order so repeated queries still vary between decks.
+    Entries expire after IMAGE_CACHE_TTL and the least recently used
+    queries are evicted beyond IMAGE_CACHE_MAX_QUERIES.
+    """
+
+    def __init__(self, path: str = IMAGE_CACHE_PATH, ttl: int = IMAGE_CACHE_TTL, max_queries: int = IMAGE_CACHE_MAX_QUERIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_queries = max_queries
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS image_queries ("
+                "query TEXT PRIMARY KEY, urls TEXT NOT NULL, cursor INTEGER NOT NULL DEFAULT 0, "
+                "fetched REAL NOT NULL, used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS image_queries_used ON image_queries (used)")
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, query: str) -> tuple[bool, str | None]:
+        """
+        Return (hit, url). A hit with url None means the query is known to
+        have no results; (False, None) means it has to be fetched.
+        """
+        conn = self._conn()
+        key = normalize_query(query)
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT urls, cursor, fetched FROM image_queries WHERE query = ?", (key,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return False, None
+
+            urls, cursor, fetched = json.loads(row[0]), row[1], row[2]
+            ttl = self.ttl if urls else IMAGE_CACHE_NEGATIVE_TTL
+            if now - fetched > ttl:
+                conn.execute("DELETE FROM image_queries WHERE query = ?", (key,))
+                conn.execute("COMMIT")
+                return False, None
+
+            url = urls[cursor % len(urls)] if urls else None
+            conn.execute("UPDATE image_queries SET cursor = ?, used = ? WHERE query = ?", (cursor + 1, now, key))
+            conn.execute("COMMIT")
+            return True, url
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def store(self, query: str, urls: list[str], consumed: int = 1) -> None:
+        """Save a fresh batch; `consumed` candidates were already handed out."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT INTO image_queries (query, urls, cursor, fetched, used) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(query) DO UPDATE SET urls = excluded.urls, cursor = excluded.cursor, "
+            "fetched = excluded.fetched, used = excluded.used",
+            (normalize_query(query), json.dumps(urls), consumed, now, now),
+        )
+        conn.execute(
+            "DELETE FROM image_queries WHERE query IN ("
+            "SELECT query FROM image_queries ORDER BY used DESC LIMIT -1 OFFSET ?)",
+            (self.max_queries,),
+        )
+
+
+class SlideImageCache:
+    """
+    Persistent key -> recently resolved image URLs, for the "cache" tier.
+
+    Keys are slide titles or goals. Each key keeps its last
+    IMAGE_SLIDE_CACHE_CANDIDATES distinct URLs and hands them out in
+    round-robin order, so slides that only match their goal still get
+    different images. Lives in its own table with its own TTL and size
+    limit, so it never evicts Unsplash query results.
+    """
+
+    def __init__(
+        self,
+        path: str = IMAGE_CACHE_PATH,
+        ttl: int = IMAGE_SLIDE_CACHE_TTL,
+        max_keys: int = IMAGE_SLIDE_CACHE_MAX_KEYS,
+        candidates: int = IMAGE_SLIDE_CACHE_CANDIDATES,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.candidates = candidates
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS slide_images ("
+                "key TEXT PRIMARY KEY, urls TEXT NOT NULL, cursor INTEGER NOT NULL DEFAULT 0, "
+                "added REAL NOT NULL, used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS slide_images_used ON slide_images (used)")
+            self._local.conn = conn
+        return conn
+
+    def recall(self, key: str) -> str | None:
+        """Next remembered URL for `key`, None if nothing fresh is stored."""
+        conn = self._conn()
+        key = normalize_query(key)
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT urls, cursor, added FROM slide_images WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[2] > self.ttl:
+                conn.execute("DELETE FROM slide_images WHERE key = ?", (key,))
+                conn.execute("COMMIT")
+                return None
+
+            urls, cursor = json.loads(row[0]), row[1]
+            conn.execute("UPDATE slide_images SET cursor = ?, used = ? WHERE key = ?", (cursor + 1, now, key))
+            conn.execute("COMMIT")
+            return urls[cursor % len(urls)]
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def remember(self, key: str, url: str) -> None:
+        """Add `url` to the candidates of `key`, dropping the oldest beyond the limit."""
+        conn = self._conn()
+        key = normalize_query(key)
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT urls, cursor, added FROM slide_images WHERE key = ?", (key,)).fetchone()
+            urls = json.loads(row[0]) if row and now - row[2] <= self.ttl else []
+            if url not in urls:
+                urls = (urls + [url])[-self.candidates:]
+            conn.execute(
+                "INSERT INTO slide_images (key, urls, cursor, added, used) VALUES (?, ?, 0, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET urls = excluded.urls, added = excluded.added, used = excluded.used",
+                (key, json.dumps(urls), now, now),
+            )
+            conn.execute(
+                "DELETE FROM slide_images WHERE key IN ("
+                "SELECT key FROM slide_images ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_keys,),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+image_cache = ImageQueryCache()
+slide_image_cache = SlideImageCache()
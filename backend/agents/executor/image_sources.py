@@ -0,0 +1,276 @@
+# image_sources.py
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+
+from .memo import mark_degraded
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated tiers, tried in order
+IMAGE_SOURCES = os.getenv("IMAGE_SOURCES", "local,unsplash")
+IMAGE_LIBRARY_DIR = os.getenv("IMAGE_LIBRARY_DIR", "./image_library")
+# Cosine similarity below which a local match is not good enough
+IMAGE_LIBRARY_MIN_SCORE = float(os.getenv("IMAGE_LIBRARY_MIN_SCORE", 0.2))
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "the", "and", "for", "with", "from", "that", "this", "are", "was", "its",
+    "into", "over", "your", "our", "their", "how", "what", "why", "key",
+}
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 2 and t not in _STOPWORDS]
+
+
+class ImageSource:
+    """
+    Resolves one slide to an image: an http(s) URL or a local file path.
+    Returns None when this source has nothing suitable.
+    """
+    name = "base"
+
+    async def find(self, slide_text: str, goal: str) -> str | None:
+        raise NotImplementedError
+
+
+def _slide_keys(slide_text: str, goal: str) -> list[str]:
+    """Keys under which a resolved slide image is remembered (see SlideImageCache)."""
+    title = slide_text.split("\n", 1)[0].strip()
+    return [f"slide:{goal}:{title}", f"goal:{goal}"]
+
+
+class UnsplashSource(ImageSource):
+    """LLM-generated queries against the (cached) Unsplash API."""
+    name = "unsplash"
+
+    async def find(self, slide_text: str, goal: str) -> str | None:
+        # Imported here: image_agent builds its default source from this module
+        from .image_agent import generate_image_queries, fetch_image_url
+        from .image_cache import slide_image_cache
+
+        for query in await generate_image_queries(slide_text, goal):
+            image_url = await fetch_image_url(query)
+            if image_url:
+                # Let CachedImageSource answer this slide later without the LLM or network
+                try:
+                    for key in _slide_keys(slide_text, goal):
+                        await asyncio.to_thread(slide_image_cache.remember, key, image_url)
+                except Exception as e:
+                    logger.warning("Image cache unavailable: %s", e)
+                return image_url
+        return None
+
+
+class CachedImageSource(ImageSource):
+    """
+    Images earlier decks resolved for the same slide title or goal.
+    Reads the slide image cache only: no LLM call and no network.
+    """
+    name = "cache"
+
+    async def find(self, slide_text: str, goal: str) -> str | None:
+        from .image_cache import slide_image_cache
+
+        for key in _slide_keys(slide_text, goal):
+            try:
+                url = await asyncio.to_thread(slide_image_cache.recall, key)
+            except Exception as e:
+                logger.warning("Image cache unavailable: %s", e)
+                mark_degraded(f"image cache unavailable: {e}")
+                return None
+            if url:
+                return url
+        return None
+
+
+class LocalImageIndex:
+    """
+    TF-IDF inverted index over an image directory.
+
+    Every image is described by a caption: a `<name>.txt` sidecar, an entry
+    in `captions.json` ({"file.jpg": "caption and tags"}) or, failing both,
+    its file name. Postings are stored term-major as NumPy arrays under
+    `<dir>/.index/`, built once and memory-mapped on later loads; a
+    signature of file names and mtimes triggers a rebuild when the
+    library changes.
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.index_dir = self.root / ".index"
+        self.files: list[str] = []
+        self.vocab: dict[str, int] = {}
+        self.idf = self.indptr = self.docs = self.weights = None
+
+    def _images(self) -> list[Path]:
+        return sorted(p for p in self.root.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS and p.is_file())
+
+    def _signature(self, images: list[Path]) -> str:
+        h = hashlib.sha256()
+        for p in images + [self.root / "captions.json"] + [p.with_suffix(".txt") for p in images]:
+            if p.exists():
+                h.update(f"{p.name}:{p.stat().st_mtime_ns}\n".encode("utf-8"))
+        return h.hexdigest()
+
+    def _captions(self, images: list[Path]) -> list[str]:
+        captions = {}
+        manifest = self.root / "captions.json"
+        if manifest.exists():
+            try:
+                captions = json.loads(manifest.read_text(encoding="utf-8"))
+            except Exception as e:
+                logger.warning("Ignoring unreadable %s: %s", manifest, e)
+
+        out = []
+        for p in images:
+            sidecar = p.with_suffix(".txt")
+            if sidecar.exists():
+                text = sidecar.read_text(encoding="utf-8")
+            else:
+                text = captions.get(p.name) or p.stem.replace("_", " ").replace("-", " ")
+            out.append(text)
+        return out
+
+    def load(self) -> "LocalImageIndex":
+        # Deferred: only needed once a library directory exists
+        import numpy as np
+
+        images = self._images()
+        signature = self._signature(images)
+        sig_file = self.index_dir / "signature"
+
+        if not (sig_file.exists() and sig_file.read_text() == signature):
+            self._build(images, signature)
+
+        self.files = json.loads((self.index_dir / "files.json").read_text(encoding="utf-8"))
+        self.vocab = json.loads((self.index_dir / "vocab.json").read_text(encoding="utf-8"))
+        self.idf = np.load(self.index_dir / "idf.npy", mmap_mode="r")
+        self.indptr = np.load(self.index_dir / "indptr.npy", mmap_mode="r")
+        self.docs = np.load(self.index_dir / "docs.npy", mmap_mode="r")
+        self.weights = np.load(self.index_dir / "weights.npy", mmap_mode="r")
+        return self
+
+    def _build(self, images: list[Path], signature: str) -> None:
+        import numpy as np
+
+        doc_terms = [Counter(tokenize(c)) for c in self._captions(images)]
+        df = Counter(t for terms in doc_terms for t in terms)
+        vocab = {t: i for i, t in enumerate(sorted(df))}
+        n = len(images)
+        idf = np.array([math.log((1 + n) / (1 + df[t])) + 1 for t in sorted(df)], dtype=np.float32)
+
+        # (term, doc, weight) with log-scaled tf and per-document L2 normalisation
+        entries = []
+        for doc, terms in enumerate(doc_terms):
+            w = {t: (1 + math.log(c)) * idf[vocab[t]] for t, c in terms.items()}
+            norm = math.sqrt(sum(v * v for v in w.values())) or 1.0
+            entries.extend((vocab[t], doc, v / norm) for t, v in w.items())
+        entries.sort()
+
+        term_ids = np.array([e[0] for e in entries], dtype=np.int64)
+        indptr = np.searchsorted(term_ids, np.arange(len(vocab) + 1)).astype(np.int64)
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        np.save(self.index_dir / "idf.npy", idf)
+        np.save(self.index_dir / "indptr.npy", indptr)
+        np.save(self.index_dir / "docs.npy", np.array([e[1] for e in entries], dtype=np.int32))
+        np.save(self.index_dir / "weights.npy", np.array([e[2] for e in entries], dtype=np.float32))
+        (self.index_dir / "files.json").write_text(json.dumps([str(p.resolve()) for p in images]), encoding="utf-8")
+        (self.index_dir / "vocab.json").write_text(json.dumps(vocab), encoding="utf-8")
+        # Written last: a crash mid-build leaves a stale signature and forces a rebuild
+        (self.index_dir / "signature").write_text(signature)
+        logger.info("Indexed %d local images (%d terms)", n, len(vocab))
+
+    def search(self, text: str) -> tuple[str | None, float]:
+        """Best matching image path and its cosine score."""
+        terms = Counter(t for t in tokenize(text) if t in self.vocab)
+        if not terms or not self.files:
+            return None, 0.0
+
+        import numpy as np
+
+        q = {self.vocab[t]: (1 + math.log(c)) * float(self.idf[self.vocab[t]]) for t, c in terms.items()}
+        norm = math.sqrt(sum(v * v for v in q.values()))
+
+        scores = np.zeros(len(self.files), dtype=np.float32)
+        for term_id, weight in q.items():
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            # A term posts each document at most once, so fancy-index += is safe
+            scores[self.docs[start:end]] += (weight / norm) * self.weights[start:end]
+
+        best = int(scores.argmax())
+        return self.files[best], float(scores[best])
+
+
+class LocalLibrarySource(ImageSource):
+    """Matches slide text against a local image library, no network involved."""
+    name = "local"
+
+    def __init__(self, root: str | Path = IMAGE_LIBRARY_DIR, min_score: float = IMAGE_LIBRARY_MIN_SCORE):
+        self.root = Path(root)
+        self.min_score = min_score
+        self._index: LocalImageIndex | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self.root.is_dir()
+
+    def index(self) -> LocalImageIndex:
+        with self._lock:
+            if self._index is None:
+                self._index = LocalImageIndex(self.root).load()
+            return self._index
+
+    async def find(self, slide_text: str, goal: str) -> str | None:
+        if not self.available:
+            return None
+        try:
+            index = self._index or await asyncio.to_thread(self.index)
+            path, score = index.search(f"{slide_text}\n{goal}")
+        except Exception as e:
+            logger.warning("Local image library unavailable: %s", e)
+            mark_degraded(f"local image library unavailable: {e}")
+            return None
+        return path if path and score >= self.min_score else None
+
+
+class TieredImageSource(ImageSource):
+    """Tries each source in order and returns the first hit."""
+    name = "tiered"
+
+    def __init__(self, sources: list[ImageSource]):
+        self.sources = sources
+
+    async def find(self, slide_text: str, goal: str) -> str | None:
+        for source in self.sources:
+            image = await source.find(slide_text, goal)
+            if image:
+                return image
+        return None
+
+
+SOURCE_TYPES = {
+    "local": LocalLibrarySource,
+    "unsplash": UnsplashSource,
+    "cache": CachedImageSource,
+}
+
+
+def build_image_source(spec: str = IMAGE_SOURCES) -> ImageSource:
+    """Build a tiered source from a spec such as "local,unsplash"."""
+    names = [n.strip().lower() for n in spec.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SOURCE_TYPES]
+    if unknown:
+        raise ValueError(f"Unknown image sources: {unknown}")
+    return TieredImageSource([SOURCE_TYPES[n]() for n in names])
@@ -0,0 +1,80 @@
+# latency.py
+import threading
+from collections import deque
+from typing import Dict
+
+# Priors (seconds) used until an agent has real samples
+DEFAULT_AGENT_LATENCY = {
+    "research_agent": 6.0,
+    "content_agent": 12.0,
+    "image_agent": 8.0,
+    "image_agent:slide": 2.0,
+    "slide_agent": 0.05,
+    "executor_agent": 4.0,
+}
+FALLBACK_LATENCY = 1.0
+MIN_SAMPLES = 5
+
+
+def profile_key(node) -> str:
+    """
+    Profile bucket of a node: its agent, except that per-slide image nodes
+    (input {"slide": n}) are timed apart from whole-deck image nodes.
+    """
+    if node.agent == "image_agent" and isinstance(node.input, dict) and "slide" in node.input:
+        return "image_agent:slide"
+    return node.agent
+
+
+class LatencyProfile:
+    """
+    Rolling per-agent execution times (last `window` runs each).
+    Memo hits are not recorded; they would make agents look free.
+    """
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, agent: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(agent, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, agent: str, q: float) -> float:
+        with self._lock:
+            samples = sorted(self._samples.get(agent, ()))
+        if len(samples) < MIN_SAMPLES:
+            return DEFAULT_AGENT_LATENCY.get(agent, FALLBACK_LATENCY)
+        return samples[int(q * (len(samples) - 1))]
+
+    def p50(self, agent: str) -> float:
+        return self.percentile(agent, 0.5)
+
+    def p95(self, agent: str) -> float:
+        return self.percentile(agent, 0.95)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            agents = {a: len(s) for a, s in self._samples.items()}
+        return {a: {"samples": n, "p50": self.p50(a), "p95": self.p95(a)} for a, n in agents.items()}
+
+
+def critical_path_seconds(nodes: dict, edges: list, cost) -> float:
+    """Longest path through the DAG where `cost(node_id)` is each node's duration."""
+    preds = {n: [] for n in nodes}
+    for src, dst in edges:
+        preds[dst].append(src)
+
+    finish: Dict[str, float] = {}
+
+    def _finish(node_id: str) -> float:
+        if node_id not in finish:
+            finish[node_id] = cost(node_id) + max((_finish(p) for p in preds[node_id]), default=0.0)
+        return finish[node_id]
+
+    return max((_finish(n) for n in nodes), default=0.0)
+
+
+# Shared by executors (writers) and the planner (reader)
+latency_profile = LatencyProfile()
@@ -0,0 +1,119 @@
+# llm.py
+import asyncio
+import functools
+import os
+
+from core.env import load_env
+from utils.quota import counts_as_failure, quota
+from utils.resilience import breaker, resilient_call, CircuitOpenError
+
+load_env()
+
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+# Fire a second completion when the first runs past the observed p95 (costs tokens)
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() in ("1", "true", "yes")
+
+
+@functools.lru_cache(maxsize=None)
+def _openai():
+    """The openai module, imported on first use; it is the slowest import in the app."""
+    import openai
+
+    openai.api_key = os.getenv("OPENAI_API_KEY")
+    return openai
+
+
+def warm_up() -> None:
+    """Registry warm-up hook."""
+    _openai()
+
+
+def _estimate_tokens(prompt: str, max_tokens: int) -> int:
+    # ~4 characters per token is close enough for budgeting
+    return len(prompt) // 4 + max_tokens
+
+
+async def chat_completion(prompt: str, max_tokens: int, temperature: float = 0.3, **kwargs) -> str:
+    """
+    Single-turn chat completion, drawn from the shared OpenAI quota and
+    guarded by the "openai:chat" circuit breaker (which 4xx answers,
+    rate limits included, and local quota refusals do not trip).
+    Raises on failure; agents keep their own fallbacks.
+    """
+    async def _attempt():
+        async with quota.lease("openai", tokens=_estimate_tokens(prompt, max_tokens)) as lease:
+            response = await asyncio.to_thread(
+                lambda: _openai().chat.completions.create(
+                    model=LLM_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    **kwargs,
+                )
+            )
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                lease.used_tokens = getattr(usage, "total_tokens", None)
+        return response
+
+    response = await resilient_call("openai:chat", _attempt, hedge=LLM_HEDGE, counts_as_failure=counts_as_failure)
+    return response.choices[0].message.content.strip()
+
+
+async def stream_completion(prompt: str, max_tokens: int, temperature: float = 0.3):
+    """Yield text deltas of a streamed chat completion.
+
+    The sync OpenAI stream is drained on a worker thread and bridged to the
+    event loop through a queue, so other coroutines keep running meanwhile.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    def _pump():
+        try:
+            stream = _openai().chat.completions.create(
+                model=LLM_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk.choices[0].delta.content)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    # Streams are not hedged; the breaker judges them by time to first token.
+    # Budget comes first so a quota refusal never claims a half-open probe.
+    async with quota.lease("openai", tokens=_estimate_tokens(prompt, max_tokens), stream=True) as lease:
+        cb = breaker("openai:stream")
+        if not cb.allow():
+            raise CircuitOpenError("Circuit openai:stream is open")
+
+        started = loop.time()
+        recorded = False
+        try:
+            pump = asyncio.ensure_future(asyncio.to_thread(_pump))
+            while True:
+                item = await queue.get()
+                if isinstance(item, Exception):
+                    if counts_as_failure(item):
+                        recorded = True
+                        cb.record(loop.time() - started, ok=False)
+                    raise item
+                if not recorded:
+                    recorded = True
+                    cb.record(loop.time() - started, ok=True)
+                if item is done:
+                    break
+                lease.first_token()
+                yield item
+            await pump
+        finally:
+            if not recorded:
+                # Cancelled, or the consumer closed the stream before the first token
+                cb.release_probe()
@@ -0,0 +1,101 @@
+# memo.py
+import contextvars
+import copy
+import hashlib
+import json
+import os
+from typing import Any, Awaitable, Callable, List, Tuple
+
+from cachetools import TTLCache
+
+NODE_MEMO_SIZE = int(os.getenv("NODE_MEMO_SIZE", 512))
+NODE_MEMO_TTL = int(os.getenv("NODE_MEMO_TTL", 3600))
+
+# Reasons the running unit of work fell back to a degraded result; None when nothing is tracking
+_degraded: contextvars.ContextVar[List[str] | None] = contextvars.ContextVar("node_degraded", default=None)
+
+
+def content_hash(*parts: Any) -> str:
+    """Stable sha256 over JSON-serialisable parts (dict keys are sorted)."""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def mark_degraded(reason: str) -> None:
+    """
+    Flag the result being computed as a fallback (error text, placeholder,
+    missing image) so it is returned but never memoised.
+    """
+    flags = _degraded.get()
+    if flags is not None:
+        flags.append(reason)
+
+
+def degraded_flags() -> List[str] | None:
+    """Reason list of the work running now, for helpers that finish it from another task."""
+    return _degraded.get()
+
+
+async def run_tracked(work: Awaitable, flags: List[str] | None = None) -> Tuple[Any, List[str]]:
+    """Await `work`, collecting the mark_degraded() reasons it reports into `flags`."""
+    flags = [] if flags is None else flags
+    token = _degraded.set(flags)
+    try:
+        return await work, flags
+    finally:
+        _degraded.reset(token)
+
+
+class NodeMemo:
+    """
+    Content-addressed cache of agent outputs.
+
+    Keys are hashes of everything a unit of work reads (agent name, explicit
+    input, goal, slide count and upstream outputs), so a hit is only possible
+    when re-running it would see exactly the same inputs. Results flagged
+    with mark_degraded() are not stored, so a transient failure is retried
+    on the next run instead of being served until it expires.
+    """
+
+    def __init__(self, maxsize: int = NODE_MEMO_SIZE, ttl: int = NODE_MEMO_TTL):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, kind: str, *parts: Any) -> str:
+        return content_hash(kind, *parts)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        if key in self._cache:
+            self.hits += 1
+            # Callers may mutate what they get back; never hand out the cached object
+            return True, copy.deepcopy(self._cache[key])
+        self.misses += 1
+        return False, None
+
+    def put(self, key: str, value: Any) -> None:
+        self._cache[key] = copy.deepcopy(value)
+
+    def touch(self, key: str) -> bool:
+        """Restart `key`'s TTL without replacing its value; False if it is not cached."""
+        if key not in self._cache:
+            return False
+        self._cache[key] = self._cache[key]
+        return True
+
+    async def compute(self, key: str, fn: Callable[[], Awaitable]) -> Any:
+        """Memoised `await fn()`; degraded results are returned but not stored."""
+        found, value = self.get(key)
+        if found:
+            return value
+        value, degraded = await run_tracked(fn())
+        if not degraded:
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+# Shared across executors so repeated runs and slide edits can reuse work
+node_memo = NodeMemo()
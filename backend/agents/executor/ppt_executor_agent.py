@@ -1,29 +1,55 @@
 import asyncio
+import contextvars
+import functools
 import logging
 from pathlib import Path
 from typing import Dict
 import uuid
 
-# Import ppt builder robustly: prefer package import, fallback to loading by file path
-try:
-    from ppt.ppt_builder import download_image, build_presentation
-except Exception:
-    import importlib.util
-    from pathlib import Path as _P
-
-    backend_root = _P(__file__).resolve().parents[2]
-    ppt_file = backend_root / "ppt" / "ppt_builder.py"
-    spec = importlib.util.spec_from_file_location("ppt_builder", str(ppt_file))
-    ppt_mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(ppt_mod)
-    download_image = ppt_mod.download_image
-    build_presentation = ppt_mod.build_presentation
-
 logger = logging.getLogger(__name__)
 
+# Bulk generation shares downloads between its decks: {image_url: task}
+shared_downloads: contextvars.ContextVar[dict | None] = contextvars.ContextVar("shared_downloads", default=None)
+
+
+@functools.lru_cache(maxsize=None)
+def _ppt_builder():
+    """Import ppt builder (python-pptx, httpx) on first use.
+
+    Prefer the package import, fall back to loading it by file path.
+    """
+    try:
+        from ppt import ppt_builder
+        return ppt_builder
+    except Exception:
+        import importlib.util
+        from pathlib import Path as _P
+
+        backend_root = _P(__file__).resolve().parents[2]
+        ppt_file = backend_root / "ppt" / "ppt_builder.py"
+        spec = importlib.util.spec_from_file_location("ppt_builder", str(ppt_file))
+        ppt_mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(ppt_mod)
+        return ppt_mod
+
+
+async def _download(image_url: str, tmp_dir: Path):
+    shared = shared_downloads.get()
+    if shared is None:
+        return await asyncio.to_thread(_ppt_builder().download_image, image_url, tmp_dir)
+    if image_url not in shared:
+        shared[image_url] = asyncio.ensure_future(asyncio.to_thread(_ppt_builder().download_image, image_url, tmp_dir))
+    # One deck being cancelled must not cancel the download for the others
+    return await asyncio.shield(shared[image_url])
+
+
+def warm_up() -> None:
+    """Registry warm-up hook."""
+    _ppt_builder()
+
 
 async def executor_agent(input_data: Dict) -> Dict:
-    """Builds a Gamma-styled PPTX using `ppt_builder`.
+    """Builds a PPTX in the run's style (`state["style"]`) using `ppt_builder`.
 
     Expects `state` to contain `slide_agent` with {'slides': [...]}.
     Downloads images to a temporary folder and returns a unique output path.
@@ -50,7 +76,7 @@ async def executor_agent(input_data: Dict) -> Dict:
         if image_url:
             try:
                 # run blocking download in threadpool
-                image_path = await asyncio.to_thread(download_image, image_url, tmp_dir)
+                image_path = await _download(image_url, tmp_dir)
             except Exception as e:
                 logger.warning("Image download failed for slide %s: %s", idx, e)
                 image_path = None
@@ -71,7 +97,7 @@ async def executor_agent(input_data: Dict) -> Dict:
 
     try:
         # build_presentation is IO-bound; run in threadpool
-        await asyncio.to_thread(build_presentation, out_slides, out_path)
+        await asyncio.to_thread(_ppt_builder().build_presentation, out_slides, out_path, state.get("style"))
     except Exception as e:
         logger.exception("Failed to build presentation: %s", e)
         return {"error": str(e)}
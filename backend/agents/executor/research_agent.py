@@ -1,11 +1,95 @@
 # research_agent.py
 import asyncio
-import openai
+import re
 import os
-import dotenv
 
-dotenv.load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
+from core.env import load_env
+from .llm import chat_completion, warm_up  # noqa: F401 - warm_up is the registry hook
+from .memo import mark_degraded
+
+load_env()
+
+# "facets": research several sub-facets concurrently and merge them
+# "single": one completion about the whole topic
+RESEARCH_MODE = os.getenv("RESEARCH_MODE", "facets").lower()
+RESEARCH_FACETS = [
+    f.strip()
+    for f in os.getenv(
+        "RESEARCH_FACETS",
+        "background and context,key concepts,applications and examples,challenges and future directions",
+    ).split(",")
+    if f.strip()
+]
+RESEARCH_FACET_TOKENS = int(os.getenv("RESEARCH_FACET_TOKENS", 150))
+RESEARCH_MAX_POINTS = int(os.getenv("RESEARCH_MAX_POINTS", 16))
+# Two points whose word sets overlap at least this much are treated as duplicates
+RESEARCH_DEDUP_THRESHOLD = float(os.getenv("RESEARCH_DEDUP_THRESHOLD", 0.6))
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _points(text: str) -> list[str]:
+    """Bullet lines of a completion, without list markers."""
+    points = []
+    for line in text.splitlines():
+        line = re.sub(r"^\s*(?:[-•*]|\d+[.)])\s*", "", line).strip()
+        if line and not line.endswith(":"):
+            points.append(line)
+    return points
+
+
+def merge_points(groups: list[list[str]], threshold: float = RESEARCH_DEDUP_THRESHOLD, limit: int = RESEARCH_MAX_POINTS) -> list[str]:
+    """
+    Interleave per-facet points (so every facet is represented before the
+    limit is hit) and drop near-duplicates by word-set Jaccard similarity.
+    """
+    kept: list[str] = []
+    kept_words: list[set] = []
+
+    for rank in range(max((len(g) for g in groups), default=0)):
+        for group in groups:
+            if rank >= len(group):
+                continue
+            point = group[rank]
+            words = {w for w in _WORD_RE.findall(point.lower()) if len(w) > 2}
+            if not words:
+                continue
+            if any(len(words & other) / len(words | other) >= threshold for other in kept_words):
+                continue
+            kept.append(point)
+            kept_words.append(words)
+            if len(kept) >= limit:
+                return kept
+
+    return kept
+
+
+async def _research_facet(goal: str, facet: str) -> list[str]:
+    prompt = f"""
+You are a research assistant.
+List 3-5 short bullet points about the {facet} of the following topic.
+
+Topic: {goal}
+
+One point per line, each under 20 words. No introduction.
+"""
+    try:
+        return _points(await chat_completion(prompt, RESEARCH_FACET_TOKENS))
+    except Exception as e:
+        mark_degraded(f"research facet {facet!r} failed: {e}")
+        return []
+
+
+async def _research_single(goal: str) -> str:
+    prompt = f"""
+You are a research assistant.
+Summarize key points about the following topic.
+
+Topic: {goal}
+
+Provide concise bullet points suitable for slides.
+"""
+    return await chat_completion(prompt, 500)
 
 
 async def research_agent(input_data: dict) -> str:
@@ -21,26 +105,18 @@ async def research_agent(input_data: dict) -> str:
     """
 
     goal = input_data.get("goal") or "General topic"
-
-    prompt = f"""
-You are a research assistant.
-Summarize key points about the following topic.
-
-Topic: {goal}
-
-Provide concise bullet points suitable for slides.
-"""
+    settings = (input_data.get("state") or {}).get("settings") or {}
+    mode = (settings.get("research_mode") or RESEARCH_MODE).lower()
 
     try:
-        response = await asyncio.to_thread(
-            lambda: openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=500,
-                temperature=0.3,
-            )
-        )
-        return response.choices[0].message.content.strip()
+        if mode == "facets" and RESEARCH_FACETS:
+            groups = await asyncio.gather(*(_research_facet(goal, facet) for facet in RESEARCH_FACETS))
+            points = merge_points(groups)
+            if points:
+                return "\n".join(f"- {p}" for p in points)
+
+        return await _research_single(goal)
 
     except Exception as e:
-        return f"ResearchAgentError: {str(e)}"
\ No newline at end of file
+        mark_degraded(f"research failed: {e}")
+        return f"ResearchAgentError: {str(e)}"
@@ -1,4 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from auth.cache import AuthUser
+from auth.dependencies import get_current_user
+from utils.fair_share import fair_scheduler
 
 from .executor_agent import GraphExecutor
 from ..planner.planner_agent import PlannerAgent
@@ -11,15 +15,17 @@ executor = GraphExecutor()
 
 
 @router.post("/run", response_model=ExecutorResponse)
-async def run_execution(request: ExecutorRequest):
+async def run_execution(request: ExecutorRequest, user: AuthUser = Depends(get_current_user)):
     """
     Execute a LangGraph-style execution graph.
+    Runs share the per-user fair scheduler with deck generation.
     """
     # 1️⃣ Build graph from planner
     graph = planner.create_plan(request.goal)
 
     # 2️⃣ Execute graph
-    final_state = await executor.execute(graph)
+    async with fair_scheduler.admit(user.id, cost=graph.num_slides):
+        final_state = await executor.execute(graph)
 
     # 3️⃣ Format response: include only nodes that are part of the graph
     results = []
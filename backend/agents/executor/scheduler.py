@@ -0,0 +1,88 @@
+# scheduler.py
+import asyncio
+import contextlib
+import heapq
+import itertools
+import os
+import weakref
+
+# Agent nodes running at once across every run in this process
+EXECUTOR_MAX_CONCURRENCY = int(os.getenv("EXECUTOR_MAX_CONCURRENCY", 8))
+# Seconds of remaining critical path one second of run age is worth
+SCHEDULER_AGE_WEIGHT = float(os.getenv("SCHEDULER_AGE_WEIGHT", 1.0))
+
+
+def urgency_key(run_started: float, remaining_seconds: float, age_weight: float = SCHEDULER_AGE_WEIGHT) -> float:
+    """
+    Lower is more urgent. Older runs and nodes with more dependent work
+    (longer remaining critical path) go first; the key is fixed at enqueue
+    time, so a waiting node never needs re-sorting.
+    """
+    return age_weight * run_started - remaining_seconds
+
+
+class _LoopQueue:
+    def __init__(self):
+        self.active = 0
+        self.waiters: list = []
+        self.seq = itertools.count()
+
+
+class NodeScheduler:
+    """
+    Shared priority queue for agent nodes of all concurrent runs.
+
+    Up to `max_concurrency` nodes run at once; when saturated, freed slots
+    go to the waiting node with the lowest `urgency_key`.
+
+        async with scheduler.slot(urgency_key(run_started, remaining)):
+            await agent_fn(payload)
+    """
+
+    def __init__(self, max_concurrency: int = EXECUTOR_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        # asyncio futures are loop-bound, so keep one queue per event loop
+        self._queues: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _queue(self) -> _LoopQueue:
+        return self._queues.setdefault(asyncio.get_running_loop(), _LoopQueue())
+
+    @contextlib.asynccontextmanager
+    async def slot(self, key: float):
+        queue = self._queue()
+        if queue.active < self.max_concurrency and not queue.waiters:
+            queue.active += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            heapq.heappush(queue.waiters, (key, next(queue.seq), waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Granted and cancelled in the same tick: pass the slot on
+                if waiter.done() and not waiter.cancelled():
+                    self._release(queue)
+                raise
+        try:
+            yield
+        finally:
+            self._release(queue)
+
+    def _release(self, queue: _LoopQueue) -> None:
+        # Hand the slot straight to the most urgent live waiter
+        while queue.waiters:
+            _, _, waiter = heapq.heappop(queue.waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        queue.active -= 1
+
+    def snapshot(self) -> dict:
+        try:
+            queue = self._queue()
+        except RuntimeError:
+            return {"max_concurrency": self.max_concurrency}
+        waiting = sum(1 for _, _, w in queue.waiters if not w.done())
+        return {"max_concurrency": self.max_concurrency, "active": queue.active, "waiting": waiting}
+
+
+node_scheduler = NodeScheduler()
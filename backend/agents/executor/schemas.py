@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Any, List
+from pydantic import BaseModel, Field, StringConstraints
+from typing import Annotated, Any, List
 
 
 class ExecutorRequest(BaseModel):
@@ -23,4 +23,25 @@ class ExecutorResponse(BaseModel):
     """
     Graph execution response.
     """
-    results: List[ExecutorNodeResult]
\ No newline at end of file
+    results: List[ExecutorNodeResult]
+
+# -------------------------
+# Structured slide content
+# -------------------------
+
+SlideLine = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+
+
+class SlideContent(BaseModel):
+    """
+    One slide as returned by content_agent in JSON mode.
+    """
+    title: SlideLine
+    bullets: List[SlideLine] = Field(..., min_length=1, max_length=6)
+
+
+class DeckContent(BaseModel):
+    """
+    Whole-deck JSON payload: {"slides": [{"title": ..., "bullets": [...]}]}.
+    """
+    slides: List[SlideContent]
@@ -1,60 +1,122 @@
 import re
 
-async def slide_agent(input_data: dict) -> dict:
+SLIDE_TITLE_RE = re.compile(r"^(\d+)\.\s*(.*)$")
+BULLET_RE = re.compile(r"^[-•*]\s+")
+PLACEHOLDER_BULLET = "Key concept overview"
+
+
+class SlideStreamParser:
     """
-    Combines content + images into logical slides.
-    Handles content_agent format: numbered slides with 3-5 bullets.
-    Ensures no duplicate slides or bullets.
+    Incremental parser for the "N. Title / - bullet" format.
+
+    Feed it text as it arrives; `feed` returns the blocks closed by that
+    text (a block closes when the next numbered title line completes) and
+    `close` flushes whatever is left at end of stream.
     """
-    state = input_data.get("state", {})
-    num_slides = state.get("num_slides", 14)
-    content_text = input_data.get("input") or state.get("content_agent", "")
-    image_dict = state.get("image_agent", {})
 
-    slides = []
-    current_slide = None
-    bullets = []
+    def __init__(self):
+        self._buffer = ""
+        self._current = None
 
-    # Split content line by line
-    lines = [line.strip() for line in content_text.splitlines() if line.strip()]
+    def feed(self, chunk: str) -> list[dict]:
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        return [block for block in map(self._consume, lines) if block is not None]
+
+    def close(self) -> list[dict]:
+        closed = []
+        if self._buffer:
+            block = self._consume(self._buffer)
+            self._buffer = ""
+            if block is not None:
+                closed.append(block)
+        if self._current is not None:
+            closed.append(self._current)
+            self._current = None
+        return closed
+
+    def _consume(self, line: str) -> dict | None:
+        line = line.strip()
+        if not line:
+            return None
 
-    for line in lines:
         # Match numbered slide title e.g. "1. Slide Title"
-        match = re.match(r"^(\d+)\.\s*(.*)$", line)
+        match = SLIDE_TITLE_RE.match(line)
         if match:
-            # Save previous slide
-            if current_slide is not None:
-                slides.append({
-                    "title": current_slide,
-                    "bullets": bullets or ["Key concept overview"],
-                    "image_url": image_dict.get(f"slide_{len(slides)+1}")
-                })
-            current_slide = match.group(2).strip()
-            bullets = []
-            continue
+            finished = self._current
+            self._current = {"title": match.group(2).strip(), "bullets": []}
+            return finished
+
+        # Lines before the first title are ignored
+        if self._current is None:
+            return None
 
         # Treat lines starting with -, •, * as bullets
-        if re.match(r"^[-•*]\s+", line):
-            bullets.append(line.lstrip("-•* ").strip())
+        if BULLET_RE.match(line):
+            self._current["bullets"].append(line.lstrip("-•* ").strip())
         else:
             # Treat any other line as a bullet
-            bullets.append(line.strip())
+            self._current["bullets"].append(line)
+        return None
+
+
+def parse_slides(content_text: str) -> list[dict]:
+    """
+    Split content_agent text into ordered {'title', 'bullets'} blocks.
+
+    A block starts at a numbered line ("1. Title"); every following line is a
+    bullet of that block. Lines before the first title are ignored.
+    """
+    parser = SlideStreamParser()
+    return parser.feed(content_text or "") + parser.close()
+
+
+def content_slides(content) -> list[dict]:
+    """
+    Slide blocks from content_agent output: either free text in the
+    numbered format or, in JSON mode, an already validated {'slides': [...]}.
+    """
+    if isinstance(content, dict):
+        return [
+            {"title": s.get("title", ""), "bullets": list(s.get("bullets") or [])}
+            for s in content.get("slides") or []
+        ]
+    return parse_slides(content)
+
+
+def slide_text(block: dict) -> str:
+    """Flatten a slide block into the plain text used for image queries."""
+    return "\n".join([block.get("title", "")] + [f"- {b}" for b in block.get("bullets", [])])
 
-    # Add last slide
-    if current_slide is not None:
-        slides.append({
-            "title": current_slide,
-            "bullets": bullets or ["Key concept overview"],
-            "image_url": image_dict.get(f"slide_{len(slides)+1}")
-        })
+
+def assemble_slide(idx: int, block: dict | None, image_dict: dict) -> dict:
+    """Build the final slide dict for 1-based position `idx`."""
+    block = block or {}
+    return {
+        "title": block.get("title") or f"Slide {idx}",
+        "bullets": block.get("bullets") or [PLACEHOLDER_BULLET],
+        "image_url": image_dict.get(f"slide_{idx}"),
+    }
+
+
+async def slide_agent(input_data: dict) -> dict:
+    """
+    Combines content + images into logical slides.
+    Handles content_agent format: numbered slides with 3-5 bullets.
+    Ensures no duplicate slides or bullets.
+    """
+    state = input_data.get("state", {})
+    num_slides = state.get("num_slides", 14)
+    content_text = input_data.get("input") or state.get("content_agent", "")
+    # Whole-deck image_agent output plus any per-slide image_agent_<n> nodes
+    image_dict = dict(state.get("image_agent") or {})
+    for key, value in state.items():
+        if key.startswith("image_agent_") and isinstance(value, dict):
+            image_dict.update(value)
+
+    blocks = content_slides(content_text)[:num_slides]
 
     # Fill placeholders if fewer than num_slides
-    while len(slides) < num_slides:
-        slides.append({
-            "title": f"Slide {len(slides)+1}",
-            "bullets": ["Key concept overview"],
-            "image_url": image_dict.get(f"slide_{len(slides)+1}")
-        })
-
-    # Limit slides to num_slides
-    return {"slides": slides[:num_slides]}
\ No newline at end of file
+    blocks += [None] * (num_slides - len(blocks))
+
+    return {"slides": [assemble_slide(idx, block, image_dict) for idx, block in enumerate(blocks, 1)]}
@@ -0,0 +1,239 @@
+"""
+Cache warm-up for trending topics.
+
+Every planned deck is counted in a count-min sketch keyed on what its node
+memo keys depend on (prompt, slide count, effective tier); the most
+requested keys are kept in a small top-k table. Counts halve every
+WARMUP_HALF_LIFE seconds, so the table follows what is popular now.
+
+While the process is idle (no admitted runs, no nodes waiting for a slot)
+the warm-up loop takes the hottest topic asked for at least
+WARMUP_MIN_COUNT times and not warmed recently, and runs its plan without
+the PPTX build step at low quota priority. That fills the node memo with
+research, content, image and slide outputs (and the image search cache),
+so the next request for the topic only has to build the file. At most
+WARMUP_MAX_RUNS_PER_HOUR warm-ups run per hour.
+"""
+import asyncio
+import collections
+import contextlib
+import hashlib
+import logging
+import os
+import time
+
+from ..planner.planner_agent import PlannerAgent
+from ..planner.schemas import GraphSpec
+from ..registry import NON_MEMOIZED_AGENTS
+from .executor_agent import GraphExecutor
+from .memo import NODE_MEMO_TTL
+from .scheduler import node_scheduler
+from utils.fair_share import fair_scheduler
+from utils.quota import Priority, quota_priority
+
+logger = logging.getLogger(__name__)
+
+TOPIC_WARMUP = os.getenv("TOPIC_WARMUP", "true").lower() in ("1", "true", "yes")
+WARMUP_INTERVAL = float(os.getenv("WARMUP_INTERVAL", 30))
+WARMUP_MAX_RUNS_PER_HOUR = int(os.getenv("WARMUP_MAX_RUNS_PER_HOUR", 10))
+WARMUP_MIN_COUNT = int(os.getenv("WARMUP_MIN_COUNT", 3))
+WARMUP_TOP_K = int(os.getenv("WARMUP_TOP_K", 32))
+WARMUP_HALF_LIFE = float(os.getenv("WARMUP_HALF_LIFE", 3600))
+# Re-warm before the memo entries expire; warm-ups rewrite them, restarting their TTL
+WARMUP_REFRESH_AFTER = 0.8 * NODE_MEMO_TTL
+# Seconds of run age added to warm-up node urgency: any user node goes first
+WARMUP_URGENCY_OFFSET = 1e6
+
+SKETCH_WIDTH = 2048
+SKETCH_DEPTH = 4
+
+
+class CountMinSketch:
+    """Approximate counts in fixed memory; estimates never undercount."""
+
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH):
+        self.width = width
+        self.rows = [[0.0] * width for _ in range(depth)]
+
+    def _cells(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=4 * len(self.rows)).digest()
+        for row in range(len(self.rows)):
+            yield row, int.from_bytes(digest[4 * row:4 * row + 4], "little") % self.width
+
+    def add(self, key: str, n: float = 1) -> float:
+        """Count `key` and return its new estimate (conservative update)."""
+        cells = list(self._cells(key))
+        estimate = min(self.rows[r][c] for r, c in cells) + n
+        for r, c in cells:
+            if self.rows[r][c] < estimate:
+                self.rows[r][c] = estimate
+        return estimate
+
+    def estimate(self, key: str) -> float:
+        return min(self.rows[r][c] for r, c in self._cells(key))
+
+    def decay(self, factor: float = 0.5) -> None:
+        for row in self.rows:
+            for c, v in enumerate(row):
+                if v:
+                    row[c] = v * factor
+
+
+class TopicTracker:
+    """Hottest (prompt, num_slides, tier) topics of recent runs."""
+
+    def __init__(self, top_k: int = WARMUP_TOP_K, half_life: float = WARMUP_HALF_LIFE):
+        self.top_k = top_k
+        self.half_life = half_life
+        self.sketch = CountMinSketch()
+        self.top: dict[str, tuple[float, dict]] = {}  # key -> (estimate, topic)
+        self._decayed = time.monotonic()
+
+    @staticmethod
+    def key(topic: dict) -> str:
+        return f"{topic['num_slides']}|{topic['tier']}|{topic['prompt']}"
+
+    def _maybe_decay(self) -> None:
+        now = time.monotonic()
+        while now - self._decayed >= self.half_life:
+            self.sketch.decay()
+            self.top = {k: (count / 2, topic) for k, (count, topic) in self.top.items()}
+            self._decayed += self.half_life
+
+    def record(self, prompt: str, num_slides: int, tier: str) -> None:
+        self._maybe_decay()
+        topic = {"prompt": prompt, "num_slides": int(num_slides), "tier": tier}
+        key = self.key(topic)
+        count = self.sketch.add(key)
+        if key in self.top or len(self.top) < self.top_k:
+            self.top[key] = (count, topic)
+            return
+        coldest = min(self.top, key=lambda k: self.top[k][0])
+        if count > self.top[coldest][0]:
+            del self.top[coldest]
+            self.top[key] = (count, topic)
+
+    def hottest(self, n: int | None = None) -> list[tuple[float, dict]]:
+        self._maybe_decay()
+        ranked = sorted(self.top.values(), key=lambda item: item[0], reverse=True)
+        return ranked[:n] if n is not None else ranked
+
+
+class WarmupScheduler:
+    def __init__(
+        self,
+        tracker: TopicTracker,
+        interval: float = WARMUP_INTERVAL,
+        max_runs_per_hour: int = WARMUP_MAX_RUNS_PER_HOUR,
+        min_count: float = WARMUP_MIN_COUNT,
+        refresh_after: float = WARMUP_REFRESH_AFTER,
+    ):
+        self.tracker = tracker
+        self.interval = interval
+        self.max_runs_per_hour = max_runs_per_hour
+        self.min_count = min_count
+        self.refresh_after = refresh_after
+        self.warmed: dict[str, float] = {}  # topic key -> monotonic time of last warm-up
+        self.started: collections.deque = collections.deque()  # warm-up start times, last hour
+        self.runs = 0
+        self.failures = 0
+        self._task: asyncio.Task | None = None
+
+    def idle(self) -> bool:
+        runs = fair_scheduler.snapshot()
+        nodes = node_scheduler.snapshot()
+        return not runs.get("active") and not runs.get("queued") and not nodes.get("waiting")
+
+    def _within_budget(self, now: float) -> bool:
+        while self.started and now - self.started[0] >= 3600:
+            self.started.popleft()
+        return len(self.started) < self.max_runs_per_hour
+
+    def candidate(self, now: float) -> dict | None:
+        """Hottest topic popular enough and not warmed within `refresh_after`."""
+        for count, topic in self.tracker.hottest():
+            if count < self.min_count:
+                return None
+            last = self.warmed.get(self.tracker.key(topic))
+            if last is None or now - last >= self.refresh_after:
+                return topic
+        return None
+
+    async def tick(self) -> dict | None:
+        """Warm one topic if idle and within budget; returns the topic warmed."""
+        now = time.monotonic()
+        if not self.idle() or not self._within_budget(now):
+            return None
+        topic = self.candidate(now)
+        if topic is None:
+            return None
+        self.started.append(now)
+        self.warmed[self.tracker.key(topic)] = now
+        try:
+            await self.warm(topic)
+        except Exception as e:
+            self.failures += 1
+            logger.warning("Warm-up failed for %r: %s", topic["prompt"][:80], e)
+            return None
+        self.runs += 1
+        logger.info("Warmed %r (%s slides, %s) in %.1fs", topic["prompt"][:80], topic["num_slides"], topic["tier"], time.monotonic() - now)
+        return topic
+
+    async def warm(self, topic: dict) -> dict:
+        """
+        Run the topic's plan, minus the (unmemoised) PPTX build, to fill the
+        node memo. Every node is recomputed: reading live entries would not
+        extend their TTL, so a re-warm must write fresh ones.
+        """
+        graph = PlannerAgent().create_plan(topic["prompt"], num_slides=topic["num_slides"], tier=topic["tier"])
+        graph = _memoizable(graph)
+        with quota_priority(Priority.LOW):
+            return await GraphExecutor(urgency_offset=WARMUP_URGENCY_OFFSET, refresh_memo=True).execute(graph)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("Warm-up tick failed")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def snapshot(self) -> dict:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "runs_last_hour": len(self.started),
+            "topics": len(self.tracker.top),
+        }
+
+
+def _memoizable(graph: GraphSpec) -> GraphSpec:
+    """`graph` without nodes whose outputs are never memoised (and nothing after them)."""
+    dropped = {node_id for node_id, node in graph.nodes.items() if node.agent in NON_MEMOIZED_AGENTS}
+    changed = True
+    while changed:
+        changed = False
+        for src, dst in graph.edges:
+            if src in dropped and dst not in dropped:
+                dropped.add(dst)
+                changed = True
+    return graph.model_copy(update={
+        "nodes": {k: v for k, v in graph.nodes.items() if k not in dropped},
+        "edges": [(s, d) for s, d in graph.edges if s not in dropped and d not in dropped],
+        "entry_nodes": [n for n in graph.entry_nodes if n not in dropped],
+    })
+
+
+topic_tracker = TopicTracker()
+warmup_scheduler = WarmupScheduler(topic_tracker)
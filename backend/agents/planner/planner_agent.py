@@ -1,18 +1,53 @@
+import logging
+import os
+
+from ppt.theme_manager import resolve_style
+
+from ..executor.latency import LatencyProfile, critical_path_seconds, latency_profile, profile_key
 from ..registry import ALLOWED_AGENTS
 from .schemas import GraphSpec, NodeSpec
 
+logger = logging.getLogger(__name__)
+
+# Cheapest first; a latency budget moves a plan down this list until it fits
+TIERS = ["fast", "balanced", "rich"]
+# fast plans skip research for decks up to this size
+FAST_RESEARCH_MAX_SLIDES = int(os.getenv("FAST_RESEARCH_MAX_SLIDES", 6))
+# ...and for any deck when research's p50 (seconds) is above this
+FAST_RESEARCH_MAX_SECONDS = float(os.getenv("FAST_RESEARCH_MAX_SECONDS", 5))
+
+TIER_SETTINGS = {
+    "fast": {"content_mode": "stream", "research_mode": "single", "image_sources": "local,cache"},
+    "balanced": {},
+    "rich": {"content_mode": "json", "research_mode": "facets"},
+}
+
 
 class PlannerAgent:
     """
     LangGraph-style planner agent that generates a DAG of nodes for execution.
+
+    Tiers trade richness for response time:
+        fast      no research for short decks, streamed content, local/cached images only
+        balanced  research -> content -> images -> slides (the default graph)
+        rich      faceted research, validated JSON content, one image node per slide
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, profile: LatencyProfile = latency_profile):
+        self.profile = profile
 
-    def create_plan(self, user_goal: str, num_slides: int = None) -> GraphSpec:
+    def create_plan(
+        self,
+        user_goal: str,
+        num_slides: int = None,
+        tier: str = "balanced",
+        latency_budget_s: float = None,
+        style: str = None,
+    ) -> GraphSpec:
         if not user_goal or not user_goal.strip():
             raise ValueError("User goal cannot be empty")
+        if tier not in TIERS:
+            raise ValueError(f"Unknown tier: {tier}")
 
         # Convert to int if provided
         if num_slides is not None:
@@ -25,29 +60,72 @@ class PlannerAgent:
         # Clamp to 1–14
         num_slides = max(1, min(num_slides, 14))
 
-        # Build nodes
-        # Do not inject num_slides via NodeSpec.input; use shared GraphSpec/state
-        nodes = {
-            "research_agent": NodeSpec(agent="research_agent", input=user_goal),
-            "content_agent": NodeSpec(agent="content_agent", input=None),
-            "image_agent": NodeSpec(agent="image_agent", input=None),
-            "slide_agent": NodeSpec(agent="slide_agent", input=None),
-            # final executor that builds the PPTX
-            "executor_agent": NodeSpec(agent="executor_agent", input=None),
-        }
-
-        edges = [
-            ("research_agent", "content_agent"),
-            ("content_agent", "image_agent"),
-            ("content_agent", "slide_agent"),
-            ("slide_agent", "executor_agent"),
-        ]
-
-        entry_nodes = ["research_agent"]
+        graph = self._build(user_goal, num_slides, tier)
+
+        # Step down until the predicted critical path fits the budget
+        while latency_budget_s is not None and graph.tier != TIERS[0]:
+            estimate = self.estimate_seconds(graph)
+            if estimate <= latency_budget_s:
+                break
+            lower = TIERS[TIERS.index(graph.tier) - 1]
+            logger.info("Plan %s estimated at %.1fs > budget %.1fs; using %s", graph.tier, estimate, latency_budget_s, lower)
+            graph = self._build(user_goal, num_slides, lower)
+
+        graph.style = resolve_style(style)
 
         # Validate agents
-        invalid_agents = {node.agent for node in nodes.values()} - ALLOWED_AGENTS
+        invalid_agents = {node.agent for node in graph.nodes.values()} - ALLOWED_AGENTS
         if invalid_agents:
             raise ValueError(f"Invalid agents detected: {invalid_agents}")
 
-        return GraphSpec(goal=user_goal, nodes=nodes, edges=edges, entry_nodes=entry_nodes, num_slides=num_slides)
+        return graph
+
+    def estimate_seconds(self, graph: GraphSpec) -> float:
+        """Critical path of the graph using each node's observed p95 (see profile_key)."""
+        return critical_path_seconds(graph.nodes, graph.edges, lambda node_id: self.profile.p95(profile_key(graph.nodes[node_id])))
+
+    def _build(self, user_goal: str, num_slides: int, tier: str) -> GraphSpec:
+        # Do not inject num_slides via NodeSpec.input; use shared GraphSpec/state
+        skip_research = tier == "fast" and (
+            num_slides <= FAST_RESEARCH_MAX_SLIDES or self.profile.p50("research_agent") > FAST_RESEARCH_MAX_SECONDS
+        )
+
+        nodes = {}
+        edges = []
+        if skip_research:
+            # content_agent writes from the goal alone
+            nodes["content_agent"] = NodeSpec(agent="content_agent", input=user_goal)
+            entry_nodes = ["content_agent"]
+        else:
+            nodes["research_agent"] = NodeSpec(agent="research_agent", input=user_goal)
+            nodes["content_agent"] = NodeSpec(agent="content_agent", input=None)
+            edges.append(("research_agent", "content_agent"))
+            entry_nodes = ["research_agent"]
+
+        nodes["slide_agent"] = NodeSpec(agent="slide_agent", input=None)
+        edges.append(("content_agent", "slide_agent"))
+
+        if tier == "rich":
+            # One image node per slide so lookups run side by side
+            for idx in range(1, num_slides + 1):
+                node_id = f"image_agent_{idx}"
+                nodes[node_id] = NodeSpec(agent="image_agent", input={"slide": idx})
+                edges += [("content_agent", node_id), (node_id, "slide_agent")]
+        else:
+            nodes["image_agent"] = NodeSpec(agent="image_agent", input=None)
+            # slide_agent attaches image_agent's per-slide URLs
+            edges += [("content_agent", "image_agent"), ("image_agent", "slide_agent")]
+
+        # final executor that builds the PPTX
+        nodes["executor_agent"] = NodeSpec(agent="executor_agent", input=None)
+        edges.append(("slide_agent", "executor_agent"))
+
+        return GraphSpec(
+            goal=user_goal,
+            nodes=nodes,
+            edges=edges,
+            entry_nodes=entry_nodes,
+            num_slides=num_slides,
+            tier=tier,
+            settings=dict(TIER_SETTINGS[tier]),
+        )
@@ -21,5 +21,8 @@ def create_execution_graph(request: PlannerRequest):
     """
     return planner_agent.create_plan(
         user_goal=request.goal,
-        num_slides=request.num_slides  # <-- Pass the user input
+        num_slides=request.num_slides,  # <-- Pass the user input
+        tier=request.tier,
+        latency_budget_s=request.latency_budget_s,
+        style=request.style,
     )
\ No newline at end of file
@@ -1,14 +1,22 @@
-from typing import Dict, List, Optional, Any
-from pydantic import BaseModel
+from typing import Dict, List, Literal, Optional, Any
+from pydantic import BaseModel, Field
 
 # -------------------------
 # Existing (keep for now)
 # -------------------------
 
 
+PlanTier = Literal["fast", "balanced", "rich"]
+
+
 class PlannerRequest(BaseModel):
     goal: str
     num_slides: Optional[int] = None  # <-- Add this
+    tier: PlanTier = "balanced"
+    # Optional end-to-end latency target in seconds; the tier is lowered to fit it
+    latency_budget_s: Optional[float] = Field(None, gt=0)
+    # Visual theme, see ppt/theme_manager.py
+    style: Optional[str] = None
 
 
 class PlanStep(BaseModel):
@@ -45,4 +53,10 @@ class GraphSpec(BaseModel):
     edges: List[tuple[str, str]]
     entry_nodes: List[str]
     # Optional overall graph-level settings
-    num_slides: Optional[int] = None
\ No newline at end of file
+    num_slides: Optional[int] = None
+    tier: Optional[PlanTier] = None
+    # Only affects rendering, so it is kept out of `settings` (and node memo keys)
+    style: Optional[str] = None
+    # Agent options chosen by the planner (content_mode, image_sources, ...);
+    # exposed to agents as state["settings"]
+    settings: Dict[str, Any] = Field(default_factory=dict)
\ No newline at end of file
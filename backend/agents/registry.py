@@ -1,10 +1,11 @@
 # agents/registry.py
+import importlib
+import logging
+import threading
+import time
+from collections.abc import MutableMapping
 
-from .executor.research_agent import research_agent
-from .executor.content_agent import content_agent
-from .executor.image_agent import image_agent
-from .executor.slide_agent import slide_agent
-from .executor.ppt_executor_agent import executor_agent
+logger = logging.getLogger(__name__)
 
 ALLOWED_AGENTS = {
     "research_agent",
@@ -15,11 +16,86 @@ ALLOWED_AGENTS = {
     "code_agent"
 }
 
-AGENT_REGISTRY = {
-    "research_agent": research_agent,
-    "content_agent": content_agent,
-    "image_agent": image_agent,
-    "slide_agent": slide_agent,
-    "executor_agent": executor_agent,
-    # "code_agent": code_agent  # add when implemented
-}
\ No newline at end of file
+# Agents with side effects (files on disk) that must run every time
+NON_MEMOIZED_AGENTS = {
+    "executor_agent",
+}
+
+# "module:callable", relative to this package; imported on first use
+AGENT_PATHS = {
+    "research_agent": ".executor.research_agent:research_agent",
+    "content_agent": ".executor.content_agent:content_agent",
+    "image_agent": ".executor.image_agent:image_agent",
+    "slide_agent": ".executor.slide_agent:slide_agent",
+    "executor_agent": ".executor.ppt_executor_agent:executor_agent",
+    # "code_agent": ".executor.code_agent:code_agent"  # add when implemented
+}
+
+
+class LazyAgentRegistry(MutableMapping):
+    """
+    Agent name -> callable, importing each agent module the first time it
+    is looked up. `import_seconds` records how long each import took.
+    Callables can also be registered directly (`registry[name] = fn` or
+    `update()`), overriding or adding to the lazy paths.
+    """
+
+    def __init__(self, paths: dict[str, str]):
+        self.paths = paths
+        self.import_seconds: dict[str, float] = {}
+        self._agents: dict = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str):
+        agent = self._agents.get(name)
+        if agent is not None:
+            return agent
+        module_path, _, attr = self.paths[name].partition(":")
+        with self._lock:
+            if name not in self._agents:
+                started = time.perf_counter()
+                module = importlib.import_module(module_path, __package__)
+                self.import_seconds[name] = time.perf_counter() - started
+                self._agents[name] = getattr(module, attr)
+                logger.info("Loaded agent %s in %.3fs", name, self.import_seconds[name])
+            return self._agents[name]
+
+    def __setitem__(self, name: str, agent) -> None:
+        with self._lock:
+            self._agents[name] = agent
+
+    def __delitem__(self, name: str) -> None:
+        with self._lock:
+            if name not in self._agents and name not in self.paths:
+                raise KeyError(name)
+            self._agents.pop(name, None)
+            # Copy before dropping a path: the mapping passed in may be shared
+            if name in self.paths:
+                self.paths = {k: v for k, v in self.paths.items() if k != name}
+
+    def __iter__(self):
+        return iter({**dict.fromkeys(self.paths), **dict.fromkeys(self._agents)})
+
+    def __len__(self) -> int:
+        return len(self.paths.keys() | self._agents.keys())
+
+    def warm(self) -> dict[str, float]:
+        """
+        Import every agent and run its module's optional `warm_up()` hook
+        (heavy client libraries, indexes). Returns seconds per agent.
+        """
+        timings = {}
+        for name in list(self):
+            started = time.perf_counter()
+            agent = self[name]
+            hook = getattr(importlib.import_module(agent.__module__), "warm_up", None)
+            if hook is not None:
+                try:
+                    hook()
+                except Exception as e:
+                    logger.warning("Warm-up of %s failed: %s", name, e)
+            timings[name] = time.perf_counter() - started
+        return timings
+
+
+AGENT_REGISTRY = LazyAgentRegistry(AGENT_PATHS)
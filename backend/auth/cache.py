@@ -0,0 +1,100 @@
+"""
+Authentication cache.
+
+Decoded token claims are cached by token hash and user records by id, so
+an authenticated request normally costs a dict lookup instead of a JWT
+decode plus a users-table query. User rows changed or deleted through the
+ORM drop out of this process's cache immediately; other workers see the
+change within AUTH_CACHE_TTL seconds.
+
+With AUTH_STATELESS=true the user is built from the signed claims alone
+and the database is never consulted: a deleted user keeps access until
+their token expires.
+"""
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from cachetools import TTLCache
+from sqlalchemy import event
+
+from core.env import load_env
+from .models import User
+
+load_env()
+
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 4096))
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", 60))
+AUTH_STATELESS = os.getenv("AUTH_STATELESS", "false").lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class AuthUser:
+    """Session-independent snapshot of a `User`; what `get_current_user` returns."""
+    id: str
+    name: str | None = None
+    email: str | None = None
+    auth_provider: str | None = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "AuthUser":
+        return cls(id=user.id, name=user.name, email=user.email, auth_provider=user.auth_provider)
+
+    @classmethod
+    def from_claims(cls, claims: dict) -> "AuthUser":
+        return cls(id=claims["sub"], name=claims.get("name"), email=claims.get("email"), auth_provider=claims.get("provider"))
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class AuthCache:
+    def __init__(self, size: int = AUTH_CACHE_SIZE, ttl: int = AUTH_CACHE_TTL):
+        self._claims = TTLCache(maxsize=size, ttl=ttl)
+        self._users = TTLCache(maxsize=size, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get_claims(self, token: str) -> dict | None:
+        with self._lock:
+            claims = self._claims.get(token_key(token))
+        # Never outlive the token itself
+        if claims is not None and claims.get("exp", float("inf")) <= time.time():
+            return None
+        return claims
+
+    def put_claims(self, token: str, claims: dict) -> None:
+        with self._lock:
+            self._claims[token_key(token)] = claims
+
+    def get_user(self, user_id: str) -> AuthUser | None:
+        with self._lock:
+            return self._users.get(user_id)
+
+    def put_user(self, user: AuthUser) -> None:
+        with self._lock:
+            self._users[user.id] = user
+
+    def invalidate_user(self, user_id: str) -> None:
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def invalidate_token(self, token: str) -> None:
+        with self._lock:
+            self._claims.pop(token_key(token), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._claims.clear()
+            self._users.clear()
+
+
+auth_cache = AuthCache()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target: User) -> None:
+    auth_cache.invalidate_user(target.id)
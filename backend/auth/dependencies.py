@@ -1,7 +1,9 @@
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from .cache import AUTH_STATELESS, AuthUser, auth_cache
 from .models import User
 from .utils import decode_access_token
 from utils.dependencies import get_db
@@ -12,13 +14,14 @@ security = HTTPBearer(auto_error=False)
 async def get_current_user(
     request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Dependency that returns the authenticated `User` based on a Bearer JWT.
+    """Dependency that returns the authenticated user (an `AuthUser`) based on a Bearer JWT.
 
     Expects `Authorization: Bearer <token>` header. The token is decoded using
     `auth.utils.decode_access_token` and the `sub` claim is used to look up the
-    user in the database.
+    user in the database. Both steps go through `auth.cache`; in stateless
+    mode the user comes from the claims alone.
     """
     # Prefer Authorization: Bearer <token>
     token = credentials.credentials if credentials and credentials.scheme.lower() == 'bearer' else None
@@ -30,16 +33,26 @@ async def get_current_user(
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing credentials")
 
-    try:
-        payload = decode_access_token(token)
-        user_id = payload.get("sub")
-        if not user_id:
-            raise ValueError("Missing subject in token")
-    except Exception:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
-
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    payload = auth_cache.get_claims(token)
+    if payload is None:
+        try:
+            payload = decode_access_token(token)
+            if not payload.get("sub"):
+                raise ValueError("Missing subject in token")
+        except Exception:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
+        auth_cache.put_claims(token, payload)
+
+    user_id = payload["sub"]
+    if AUTH_STATELESS:
+        return AuthUser.from_claims(payload)
+
+    user = auth_cache.get_user(user_id)
+    if user is None:
+        db_user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+        if not db_user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        user = AuthUser.from_user(db_user)
+        auth_cache.put_user(user)
 
     return user
@@ -1,20 +1,14 @@
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from .models import User
-from .utils import create_access_token
-import os
-from dotenv import load_dotenv
+from .utils import create_user_token
+from .google_verifier import google_verifier
 
-load_dotenv()
-GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
-if not GOOGLE_CLIENT_ID:
-    raise RuntimeError("GOOGLE_CLIENT_ID is not set in environment")
-
-def google_login(db: Session, token: str):
+async def google_login(db: AsyncSession, token: str):
     try:
-        idinfo = id_token.verify_oauth2_token(token, google_requests.Request(), GOOGLE_CLIENT_ID)
+        # Local signature check against cached Google certs
+        idinfo = await google_verifier.verify(token)
         email = idinfo.get("email")
         name = idinfo.get("name")
 
@@ -25,7 +19,7 @@ def google_login(db: Session, token: str):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Google token")
 
     # Check if user exists
-    user = db.query(User).filter(User.email == email).first()
+    user = (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
     if user and user.auth_provider != "google":
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered with another method")
 
@@ -38,9 +32,8 @@ def google_login(db: Session, token: str):
             hashed_password=None
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
 
     # Issue JWT
-    token = create_access_token({"sub": user.id})
+    token = create_user_token(user)
     return token
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""
+Local verification of Google ID tokens.
+
+Google's signing certificates are fetched over one pooled HTTP client and
+kept for the max-age their Cache-Control header allows. Shortly before
+they expire a background refresh replaces them, so logins only pay for
+local signature checks. A token signed by a key we have not seen yet
+(rotation) forces a single refetch.
+
+GOOGLE_CERTS_URL can point at a local stand-in serving
+{"key id": "PEM certificate"} for tests.
+"""
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+
+from core.config import GOOGLE_CLIENT_ID
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = os.getenv("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v1/certs")
+# Used when the response carries no max-age
+GOOGLE_CERTS_DEFAULT_TTL = int(os.getenv("GOOGLE_CERTS_DEFAULT_TTL", 3600))
+# Start a background refresh this many seconds before the certs expire
+GOOGLE_CERTS_REFRESH_AHEAD = int(os.getenv("GOOGLE_CERTS_REFRESH_AHEAD", 300))
+GOOGLE_CLOCK_SKEW = int(os.getenv("GOOGLE_CLOCK_SKEW", 10))
+# Unknown key ids trigger at most one refetch per this many seconds
+GOOGLE_CERTS_MIN_REFETCH = 60
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def cache_max_age(cache_control: str | None, default: int = GOOGLE_CERTS_DEFAULT_TTL) -> int:
+    match = _MAX_AGE_RE.search(cache_control or "")
+    return int(match.group(1)) if match else default
+
+
+class GoogleTokenVerifier:
+    def __init__(self, client_id: str = GOOGLE_CLIENT_ID, certs_url: str = GOOGLE_CERTS_URL):
+        self.client_id = client_id
+        self.certs_url = certs_url
+        self.certs: dict[str, str] = {}
+        self.expires_at = 0.0
+        self.fetched_at = 0.0
+        self._client = None
+        self._lock = threading.Lock()
+        self._refreshing: asyncio.Task | None = None
+
+    def _http(self):
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.Client(timeout=10)
+        return self._client
+
+    def refresh(self) -> dict[str, str]:
+        """Fetch the certificate set now (blocking) and return it."""
+        with self._lock:
+            response = self._http().get(self.certs_url)
+            response.raise_for_status()
+            self.certs = response.json()
+            self.fetched_at = time.time()
+            self.expires_at = time.time() + cache_max_age(response.headers.get("cache-control"))
+            logger.info("Fetched %d Google signing certs, valid for %ds", len(self.certs), self.expires_at - time.time())
+            return self.certs
+
+    async def _current_certs(self) -> dict[str, str]:
+        remaining = self.expires_at - time.time()
+        if not self.certs or remaining <= 0:
+            return await asyncio.to_thread(self.refresh)
+        if remaining <= GOOGLE_CERTS_REFRESH_AHEAD and (self._refreshing is None or self._refreshing.done()):
+            self._refreshing = asyncio.create_task(self._background_refresh())
+        return self.certs
+
+    async def _background_refresh(self) -> None:
+        try:
+            await asyncio.to_thread(self.refresh)
+        except Exception as e:
+            # Keep serving the current certs until they actually expire
+            logger.warning("Background refresh of Google certs failed: %s", e)
+
+    def _decode(self, token: str, certs: dict[str, str]) -> dict:
+        from google.auth import jwt
+
+        claims = jwt.decode(token, certs=certs, audience=self.client_id, clock_skew_in_seconds=GOOGLE_CLOCK_SKEW)
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer: {claims.get('iss')}")
+        return claims
+
+    async def verify(self, token: str) -> dict:
+        """Verified claims of a Google ID token; ValueError if it is invalid."""
+        from google.auth import jwt
+
+        try:
+            kid = jwt.decode_header(token).get("kid")
+        except Exception as e:
+            raise ValueError(f"Malformed token: {e}") from e
+
+        certs = await self._current_certs()
+        if kid and kid not in certs and time.time() - self.fetched_at >= GOOGLE_CERTS_MIN_REFETCH:
+            # Google rotated keys ahead of our cached set
+            certs = await asyncio.to_thread(self.refresh)
+        return self._decode(token, certs)
+
+
+google_verifier = GoogleTokenVerifier()
@@ -0,0 +1,61 @@
+"""
+Password hashing off the event loop and off the shared thread pool.
+
+bcrypt runs on a small dedicated executor, so a login burst cannot take
+the default pool that `asyncio.to_thread` LLM and download calls share.
+Requests beyond HASH_MAX_PENDING (running + queued) are turned away with
+503 instead of queueing without bound.
+"""
+import asyncio
+import concurrent.futures
+import os
+import threading
+
+from fastapi import HTTPException, status
+
+from core.env import load_env
+from .utils import pwd_context
+
+load_env()
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", min(4, os.cpu_count() or 1)))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", 64))
+HASH_RETRY_AFTER = 1
+
+
+class HashingPool:
+    def __init__(self, workers: int = HASH_WORKERS, max_pending: int = HASH_MAX_PENDING):
+        self.max_pending = max_pending
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication is busy, retry shortly",
+                    headers={"Retry-After": str(HASH_RETRY_AFTER)},
+                )
+            self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+
+hashing_pool = HashingPool()
+
+
+async def hash_password_async(password: str) -> str:
+    return await hashing_pool.run(pwd_context.hash, password)
+
+
+async def verify_and_update_async(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Verify `password`; when the stored hash uses an outdated scheme or
+    cost, also return a fresh hash to store (None otherwise).
+    """
+    return await hashing_pool.run(pwd_context.verify_and_update, password, hashed_password)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from utils.dependencies import get_db
 from .schemas import UserSignup, UserLogin, TokenResponse, GoogleTokenRequest
 from .service import signup_user, login_user
@@ -11,8 +11,8 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
 # Google Login
 # --------------------------
 @router.post("/google-login", response_model=TokenResponse)
-def login_with_google(data: GoogleTokenRequest, db: Session = Depends(get_db)):
-    token = google_login(db, data.google_token)
+async def login_with_google(data: GoogleTokenRequest, db: AsyncSession = Depends(get_db)):
+    token = await google_login(db, data.google_token)
     return TokenResponse(access_token=token)
 
 
@@ -20,8 +20,8 @@ def login_with_google(data: GoogleTokenRequest, db: Session = Depends(get_db)):
 # Signup
 # --------------------------
 @router.post("/signup", response_model=TokenResponse)
-def signup(data: UserSignup, db: Session = Depends(get_db)):
-    token = signup_user(db, data.name, data.email, data.password)
+async def signup(data: UserSignup, db: AsyncSession = Depends(get_db)):
+    token = await signup_user(db, data.name, data.email, data.password)
     return {"access_token": token}
 
 
@@ -29,6 +29,6 @@ def signup(data: UserSignup, db: Session = Depends(get_db)):
 # Login
 # --------------------------
 @router.post("/login", response_model=TokenResponse)
-def login(data: UserLogin, db: Session = Depends(get_db)):
-    token = login_user(db, data.email, data.password)
+async def login(data: UserLogin, db: AsyncSession = Depends(get_db)):
+    token = await login_user(db, data.email, data.password)
     return {"access_token": token}
@@ -1,12 +1,13 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from .models import User
-from .utils import hash_password, verify_password
-from .utils import create_access_token
+from .hashing import hash_password_async, verify_and_update_async
+from .utils import create_user_token
 
 
-def signup_user(db: Session, name: str, email: str, password: str):
-    existing_user = db.query(User).filter(User.email == email).first()
+async def signup_user(db: AsyncSession, name: str, email: str, password: str):
+    existing_user = (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -16,25 +17,33 @@ def signup_user(db: Session, name: str, email: str, password: str):
     user = User(
         name=name,
         email=email,
-        hashed_password=hash_password(password)
+        hashed_password=await hash_password_async(password)
     )
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
 
-    token = create_access_token({"sub": user.id})
+    token = create_user_token(user)
     return token
 
 
-def login_user(db: Session, email: str, password: str):
-    user = db.query(User).filter(User.email == email).first()
+async def login_user(db: AsyncSession, email: str, password: str):
+    user = (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
 
-    if not user or not verify_password(password, user.hashed_password):
+    valid, new_hash = (False, None)
+    if user and user.hashed_password:
+        valid, new_hash = await verify_and_update_async(password, user.hashed_password)
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
 
-    token = create_access_token({"sub": user.id})
+    # BCRYPT_ROUNDS changed since this hash was made: store one at the new cost
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+
+    token = create_user_token(user)
     return token
\ No newline at end of file
@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 from jose import jwt
 from passlib.context import CryptContext
+import os
 from core.config import (
     JWT_SECRET_KEY,
     JWT_ALGORITHM,
@@ -8,9 +9,13 @@ from core.config import (
 )
 
 
+# Cost factor for new hashes; existing hashes are upgraded on their next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
 pwd_context = CryptContext(
     schemes=["bcrypt"],
-    deprecated="auto"
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
 )
 
 def hash_password(password: str) -> str:
@@ -40,4 +45,14 @@ def decode_access_token(token: str) -> dict:
         token,
         JWT_SECRET_KEY,
         algorithms=[JWT_ALGORITHM]
-    )
\ No newline at end of file
+    )
+
+
+def create_user_token(user) -> str:
+    """Access token for `user`; profile claims let stateless auth skip the DB."""
+    return create_access_token({
+        "sub": user.id,
+        "email": user.email,
+        "name": user.name,
+        "provider": user.auth_provider,
+    })
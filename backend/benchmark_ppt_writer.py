@@ -0,0 +1,43 @@
+"""Compare the python-pptx and direct OOXML writers on a synthetic deck.
+
+Usage: python benchmark_ppt_writer.py [slides] [rounds]
+"""
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from ppt.ppt_builder import build_presentation
+
+num_slides = int(sys.argv[1]) if len(sys.argv) > 1 else 14
+rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+# ---- Mock slides sharing a few local images ----
+img_dir = Path("output/images/benchmark")
+img_dir.mkdir(parents=True, exist_ok=True)
+images = []
+for idx, color in enumerate(["#4F8EF7", "#EF476F", "#FFD166"]):
+    path = img_dir / f"bench_{idx}.jpg"
+    if not path.exists():
+        Image.new("RGB", (1600, 900), color).save(path, quality=90)
+    images.append(str(path))
+
+slides = [
+    {
+        "title": f"Slide {i + 1}: Generative AI",
+        "bullets": ["AI systems that create content", "Uses deep learning models", "Text, images, audio generation"],
+        "image_path": images[i % len(images)],
+    }
+    for i in range(num_slides)
+]
+
+# ---- Run both writers ----
+for writer in ("pptx", "ooxml"):
+    out = Path(f"output/benchmark_{writer}.pptx")
+    build_presentation(slides, out, writer=writer)  # warm caches
+    started = time.perf_counter()
+    for _ in range(rounds):
+        build_presentation(slides, out, writer=writer)
+    elapsed = (time.perf_counter() - started) / rounds
+    print(f"{writer:>5}: {elapsed * 1000:.1f} ms/deck, {out.stat().st_size / 1024:.0f} KiB")
@@ -0,0 +1,9 @@
+import functools
+
+from dotenv import load_dotenv
+
+
+@functools.lru_cache(maxsize=None)
+def load_env() -> None:
+    """Read .env into os.environ once per process; later calls are no-ops."""
+    load_dotenv()
@@ -1,16 +1,68 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import contextlib
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from agents.planner.routes import router as planner_router
 from agents.executor.routes import router as executor_router
 from auth.routes import router as auth_router
+from runs.routes import router as runs_router
 from agents.planner.planner_agent import PlannerAgent
+from agents.planner.schemas import PlanTier
 from agents.executor.executor_agent import GraphExecutor
-from fastapi import HTTPException, Request
-from pydantic import BaseModel, Field
+from agents.executor.warmup import TOPIC_WARMUP, topic_tracker, warmup_scheduler
+from fastapi import HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Literal, Optional
+import json
+import re
 import os
 import uuid
 from auth.dependencies import get_current_user
+from auth.cache import AuthUser
 from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from utils.database import init_db
+from utils.dependencies import get_db
+from utils.fair_share import fair_scheduler
+from utils.quota import Priority, quota_priority
+from utils.responses import ZipStream, pptx_response
+from runs.service import save_run
+from ppt.theme_manager import DEFAULT_STYLE, THEME_NAMES
+from agents.registry import AGENT_REGISTRY
+from core.env import load_env
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+# Import every agent (and its client libraries) before serving the first request
+AGENT_WARMUP = os.getenv("AGENT_WARMUP", "false").lower() in ("1", "true", "yes")
+# Largest number of decks one /generate-ppt/batch request may ask for
+BATCH_MAX_DECKS = int(os.getenv("BATCH_MAX_DECKS", 50))
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("App modules imported in %.3fs", IMPORT_SECONDS)
+    # Create tables (users, runs) if missing
+    await init_db()
+    if AGENT_WARMUP:
+        started = time.perf_counter()
+        timings = await asyncio.to_thread(AGENT_REGISTRY.warm)
+        logger.info("Agents warmed in %.3fs: %s", time.perf_counter() - started, {k: round(v, 3) for k, v in timings.items()})
+    # Pre-run popular topics while idle (see agents/executor/warmup.py)
+    if TOPIC_WARMUP:
+        warmup_scheduler.start()
+    yield
+    await warmup_scheduler.stop()
 
 
 # If you have auth middleware, import it here
@@ -20,6 +72,7 @@ app = FastAPI(
     title="Autonomous PPT Generation API",
     description="LangGraph-style DAG-based autonomous multi-agent system",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Allow frontend dev server to talk to backend
@@ -33,13 +86,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition", "Content-Length"],
+    expose_headers=["Content-Disposition", "Content-Length", "X-Run-Id"],
 )
 
 # Include routers
 app.include_router(auth_router)
 app.include_router(planner_router, dependencies=[Depends(get_current_user)])
 app.include_router(executor_router, dependencies=[Depends(get_current_user)])
+app.include_router(runs_router)
+
+
+def _check_style(value: str) -> str:
+    value = value.strip().lower()
+    if value not in THEME_NAMES:
+        raise ValueError(f"style must be one of {', '.join(THEME_NAMES)}")
+    return value
 
 
 class GeneratePPTRequest(BaseModel):
@@ -47,16 +108,101 @@ class GeneratePPTRequest(BaseModel):
     # `prompt` is the topic/goal string. `num_slides` is the desired slide count.
     prompt: str = Field(..., min_length=1)
     num_slides: int = Field(5, ge=1, le=14)
+    # Quality/latency trade-off, see PlannerAgent
+    tier: PlanTier = "balanced"
+    latency_budget_s: Optional[float] = Field(None, gt=0)
+    # Visual theme; one of ppt.theme_manager.THEME_NAMES
+    style: str = DEFAULT_STYLE
+
+    @field_validator("style")
+    @classmethod
+    def _known_style(cls, value: str) -> str:
+        return _check_style(value)
+
+
+async def run_deck(req: GeneratePPTRequest, user_id: str, db: AsyncSession):
+    """Plan, execute and store one deck; returns its `Run` (the PPTX is `run.output_file`)."""
+    prompt = req.prompt.strip()
+    num_slides = int(req.num_slides)
+
+    # Build plan and execute DAG; runs are admitted fairly across users (see utils/fair_share.py)
+    planner = PlannerAgent()
+    executor = GraphExecutor()
+
+    async with fair_scheduler.admit(user_id, cost=num_slides):
+        graph = planner.create_plan(prompt, num_slides=num_slides, tier=req.tier, latency_budget_s=req.latency_budget_s, style=req.style)
+        # Keyed like the node memo: the effective tier, not the requested one
+        topic_tracker.record(graph.goal, graph.num_slides, graph.tier)
+
+        final_state = await executor.execute(graph)
+
+    # Debug: persist final_state for inspection (temporary)
+    import json
+    os.makedirs("output", exist_ok=True)
+    try:
+        with open(os.path.join("output", "debug_state.json"), "w", encoding="utf-8") as f:
+            json.dump(final_state, f, default=str, indent=2)
+    except Exception:
+        pass
+
+    # The executor_agent node should create the PPT and return its path in state['executor_agent']['output_file']
+    executor_out = final_state.get("executor_agent") or {}
+    output_file = None
+    if isinstance(executor_out, dict):
+        output_file = executor_out.get("output_file")
+
+    if not output_file or not os.path.exists(output_file):
+        # If executor_agent didn't produce a file, attempt to build here using slides
+        # Reuse existing ppt_builder which supports downloading images from `image_url`.
+        try:
+            from ppt.ppt_builder import build_presentation
+            from pathlib import Path
 
+            # Prefer slides produced by executor_agent if present, else fallback to slide_agent
+            slides = None
+            if isinstance(executor_out, dict):
+                slides = executor_out.get("slides")
+            if not slides:
+                slide_agent_out = final_state.get("slide_agent") or {}
+                if isinstance(slide_agent_out, dict):
+                    slides = slide_agent_out.get("slides")
 
-@app.post("/generate_ppt", dependencies=[Depends(get_current_user)])
-@app.post("/generate-ppt", dependencies=[Depends(get_current_user)])
-async def generate_ppt(request: Request):
+            if not slides:
+                raise HTTPException(status_code=500, detail="Presentation build failed or output file missing")
+
+            out_dir = Path("output") / "presentations"
+            out_dir.mkdir(parents=True, exist_ok=True)
+            import uuid as _u
+            filename = f"presentation_fallback_{_u.uuid4().hex}.pptx"
+            out_path = out_dir / filename
+
+            # build_presentation will download images when slides include `image_url`
+            build_presentation(slides, out_path, graph.style)
+            output_file = str(out_path)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Presentation build failed: {e}")
+
+    # Remember the run so single slides can be edited without a full pipeline run
+    run_slides = executor_out.get("slides") if isinstance(executor_out, dict) else None
+    if not run_slides:
+        run_slides = (final_state.get("slide_agent") or {}).get("slides") or []
+    return await save_run(db, user_id, prompt, num_slides, final_state, output_file, run_slides)
+
+
+@app.post("/generate_ppt")
+@app.post("/generate-ppt")
+async def generate_ppt(
+    request: Request,
+    user: AuthUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
     """
     Accept either JSON POSTs (preferred) or legacy/browser form POSTs.
 
     Supported request formats:
-        - application/json: { "prompt": "...", "num_slides": 8 }
+        - application/json: { "prompt": "...", "num_slides": 8, "style": "modern" }
         - application/x-www-form-urlencoded or multipart form with fields:
             - `prompt` and `num_slides` OR
             - a single `payload` field containing a JSON string
@@ -65,6 +211,9 @@ async def generate_ppt(request: Request):
     `GeneratePPTRequest` Pydantic model and then runs the planner/executor.
     This avoids the common 422 error: "Input should be a valid dictionary"
     which appears when clients send a non-object body (e.g., a string).
+
+    The response carries an `X-Run-Id` header; pass it to
+    `PATCH /runs/{id}/slides/{n}` to regenerate a single slide.
     """
     import json as _json
     from pydantic import ValidationError
@@ -116,87 +265,149 @@ async def generate_ppt(request: Request):
             # Return a clear 422-like response containing validation errors
             raise HTTPException(status_code=422, detail=ve.errors())
 
-        prompt = req.prompt.strip()
-        num_slides = int(req.num_slides)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Unable to parse request body: {e}")
 
-    # Build plan and execute DAG
-    planner = PlannerAgent()
-    executor = GraphExecutor()
-
-    graph = planner.create_plan(prompt, num_slides=num_slides)
-
-    final_state = await executor.execute(graph)
+    run = await run_deck(req, user.id, db)
 
-    # Debug: persist final_state for inspection (temporary)
-    import json
-    os.makedirs("output", exist_ok=True)
-    try:
-        with open(os.path.join("output", "debug_state.json"), "w", encoding="utf-8") as f:
-            json.dump(final_state, f, default=str, indent=2)
-    except Exception:
-        pass
-
-    # The executor_agent node should create the PPT and return its path in state['executor_agent']['output_file']
-    executor_out = final_state.get("executor_agent") or {}
-    output_file = None
-    if isinstance(executor_out, dict):
-        output_file = executor_out.get("output_file")
+    # Return the generated PPT file directly as a downloadable response
+    return pptx_response(run.output_file, run.id)
 
-    if not output_file or not os.path.exists(output_file):
-        # If executor_agent didn't produce a file, attempt to build here using slides
-        # Reuse existing ppt_builder which supports downloading images from `image_url`.
-        try:
-            from ppt.ppt_builder import build_presentation
-            from pathlib import Path
+class GeneratePPTBatchRequest(BaseModel):
+    # Either plain `prompts` (sharing the settings below) or per-deck `decks`, or both
+    prompts: List[str] = Field(default_factory=list)
+    decks: List[GeneratePPTRequest] = Field(default_factory=list)
+    num_slides: int = Field(5, ge=1, le=14)
+    tier: PlanTier = "balanced"
+    style: str = DEFAULT_STYLE
+    # "links": NDJSON lines with run ids and download paths; "zip": one archive of all decks
+    output: Literal["links", "zip"] = "links"
 
-            # Prefer slides produced by executor_agent if present, else fallback to slide_agent
-            slides = None
-            if isinstance(executor_out, dict):
-                slides = executor_out.get("slides")
-            if not slides:
-                slide_agent_out = final_state.get("slide_agent") or {}
-                if isinstance(slide_agent_out, dict):
-                    slides = slide_agent_out.get("slides")
+    @field_validator("style")
+    @classmethod
+    def _known_style(cls, value: str) -> str:
+        return _check_style(value)
 
-            if not slides:
-                raise HTTPException(status_code=500, detail="Presentation build failed or output file missing")
+    @model_validator(mode="after")
+    def _deck_count(self):
+        count = len(self.all_decks())
+        if not 1 <= count <= BATCH_MAX_DECKS:
+            raise ValueError(f"a batch needs 1 to {BATCH_MAX_DECKS} decks, got {count}")
+        return self
 
-            out_dir = Path("output") / "presentations"
-            out_dir.mkdir(parents=True, exist_ok=True)
-            import uuid as _u
-            filename = f"presentation_fallback_{_u.uuid4().hex}.pptx"
-            out_path = out_dir / filename
+    def all_decks(self) -> list[GeneratePPTRequest]:
+        shared = {"num_slides": self.num_slides, "tier": self.tier, "style": self.style}
+        return [GeneratePPTRequest(prompt=p, **shared) for p in self.prompts if p.strip()] + list(self.decks)
 
-            # build_presentation will download images when slides include `image_url`
-            build_presentation(slides, out_path)
-            output_file = str(out_path)
-        except HTTPException:
-            raise
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Presentation build failed: {e}")
 
-    # Return the generated PPT file directly as a downloadable response
-    from fastapi.responses import FileResponse
+def _deck_key(req: GeneratePPTRequest) -> tuple:
+    return (" ".join(req.prompt.lower().split()), req.num_slides, req.tier, req.latency_budget_s, req.style)
 
-    # Explicitly set media type for PPTX and ensure a UTF-8 encoded
-    # `Content-Disposition` header so browsers save the file correctly.
-    from urllib.parse import quote
 
-    filename = os.path.basename(output_file)
-    quoted = quote(filename)
-    headers = {
-        "Content-Disposition": f"attachment; filename*=UTF-8''{quoted}"
-    }
+@app.post("/generate-ppt/batch")
+async def generate_ppt_batch(body: GeneratePPTBatchRequest, user: AuthUser = Depends(get_current_user)):
+    """
+    Generate many decks as one workload and stream results as decks complete.
+
+    Identical requests are generated once. Decks run at the caller's fair
+    share (see utils/fair_share.py) with LOW quota priority; a deck the fair
+    queue turns away (a saturated process, or the user's other runs and
+    batches) waits for its Retry-After and tries again, so load slows a
+    batch down but never drops decks from it. Image-query prompts from all
+    decks are coalesced into shared completions and each image URL is
+    downloaded once for the whole batch.
+
+    `output: "links"` streams NDJSON, one line per deck:
+        {"index": 0, "prompt": "...", "status": "done", "run_id": "...", "download": "/runs/<id>/download"}
+    `output: "zip"` streams a ZIP with one PPTX per deck plus manifest.json.
+    """
+    from agents.executor.image_agent import ImageQueryBatcher, image_query_batcher
+    from agents.executor.ppt_executor_agent import shared_downloads
+    from utils.database import SessionLocal
+
+    decks = body.all_decks()
+    groups: dict[tuple, list[int]] = {}
+    for i, req in enumerate(decks):
+        groups.setdefault(_deck_key(req), []).append(i)
+    logger.info("Batch of %d decks (%d distinct) for user %s", len(decks), len(groups), user.id)
+
+    # Keep each batch within the user's in-flight cap; it should not fill the user's queue on its own
+    slots = asyncio.Semaphore(max(1, fair_scheduler.user_max_inflight))
+
+    async def _one(indexes: list[int]) -> tuple[list[int], dict]:
+        req = decks[indexes[0]]
+        async with slots:
+            while True:
+                try:
+                    async with SessionLocal() as db:
+                        run = await run_deck(req, user.id, db)
+                    return indexes, {"status": "done", "run_id": run.id, "output_file": run.output_file}
+                except HTTPException as e:
+                    if e.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+                        # Turned away before any work (busy process or the user's other runs): wait our turn
+                        await asyncio.sleep(float((e.headers or {}).get("Retry-After", 1)))
+                        continue
+                    return indexes, {"status": "failed", "error": str(e.detail)}
+                except Exception as e:
+                    logger.exception("Batch deck failed: %s", e)
+                    return indexes, {"status": "failed", "error": str(e)}
+
+    def _entries(indexes: list[int], result: dict) -> list[dict]:
+        entries = []
+        for i in indexes:
+            entry = {"index": i, "prompt": decks[i].prompt, "status": result["status"]}
+            if result["status"] == "done":
+                entry.update(run_id=result["run_id"], download=f"/runs/{result['run_id']}/download")
+            else:
+                entry["error"] = result["error"]
+            entries.append(entry)
+        return entries
+
+    async def _results():
+        # Tasks created below inherit these
+        image_query_batcher.set(ImageQueryBatcher())
+        shared_downloads.set({})
+        with quota_priority(Priority.LOW):
+            tasks = [asyncio.ensure_future(_one(indexes)) for indexes in groups.values()]
+        try:
+            for done in asyncio.as_completed(tasks):
+                yield await done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _links():
+        async for indexes, result in _results():
+            for entry in _entries(indexes, result):
+                yield json.dumps(entry) + "\n"
+
+    async def _zip():
+        stream = ZipStream()
+        manifest = []
+        async for indexes, result in _results():
+            for entry in _entries(indexes, result):
+                if result["status"] == "done":
+                    entry["file"] = f"{entry['index'] + 1:02d}_{_slug(entry['prompt'])}.pptx"
+                    yield await asyncio.to_thread(stream.add_file, result["output_file"], entry["file"])
+                manifest.append(entry)
+        manifest.sort(key=lambda e: e["index"])
+        yield stream.add_bytes("manifest.json", json.dumps(manifest, indent=2).encode("utf-8"))
+        yield stream.close()
+
+    if body.output == "zip":
+        return StreamingResponse(
+            _zip(),
+            media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="presentations.zip"'},
+        )
+    return StreamingResponse(_links(), media_type="application/x-ndjson")
+
+
+def _slug(text: str, limit: int = 40) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_")[:limit] or "deck"
 
-    return FileResponse(
-        output_file,
-        media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-        headers=headers,
-    )
 
 # Optional: root endpoint
 @app.get("/")
@@ -206,4 +417,10 @@ def root():
 # Optional: health check
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {
+        "status": "ok",
+        # Cold-start cost: app import plus each agent's first (lazy) import
+        "import_seconds": round(IMPORT_SECONDS, 3),
+        "agent_import_seconds": {k: round(v, 3) for k, v in AGENT_REGISTRY.import_seconds.items()},
+        "warmup": warmup_scheduler.snapshot(),
+    }
\ No newline at end of file
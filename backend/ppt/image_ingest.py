@@ -0,0 +1,206 @@
+"""
+Streaming image ingestion.
+
+Downloads are streamed to disk while the first bytes are sniffed for the
+format and pixel size (PNG/JPEG/GIF/BMP headers, no decoding), so
+non-images, oversized bodies and absurd dimensions are rejected before
+the body is read. Each accepted file is named by its SHA-256 and gets a
+`<file>.json` sidecar holding format, width, height, size and hash;
+layout and the OOXML writer read that instead of opening the image.
+"""
+import functools
+import hashlib
+import json
+import logging
+import os
+import struct
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", 15 * 1024 * 1024))
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", 40_000_000))
+# JPEG size markers can sit behind EXIF/ICC blocks; give up past this
+IMAGE_SNIFF_BYTES = 256 * 1024
+
+# Formats PowerPoint embeds, with the extension ingested files get
+IMAGE_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "GIF": "gif", "BMP": "bmp"}
+
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+    (b"\xff\xd8", "JPEG"),
+    (b"GIF87a", "GIF"),
+    (b"GIF89a", "GIF"),
+    (b"BM", "BMP"),
+)
+# SOFn markers carry the frame size; C4 (DHT), C8 (JPG) and CC (DAC) do not
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+class ImageRejected(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class ImageMeta:
+    format: str
+    width: int
+    height: int
+    bytes: int
+    sha256: str
+
+
+def image_format(head: bytes) -> str | None:
+    """Format named by the leading magic bytes, if it is one we embed."""
+    for magic, fmt in _SIGNATURES:
+        if head.startswith(magic):
+            return fmt
+    return None
+
+
+def _jpeg_size(head: bytes) -> tuple[int, int] | None:
+    i = 2
+    while i + 9 < len(head):
+        if head[i] != 0xFF:
+            return None
+        marker = head[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if 0xD0 <= marker <= 0xD9 or marker == 0x01:  # no payload
+            i += 2
+            continue
+        if marker in _JPEG_SOF:
+            height, width = struct.unpack(">HH", head[i + 5:i + 9])
+            return width, height
+        i += 2 + struct.unpack(">H", head[i + 2:i + 4])[0]
+    return None
+
+
+def sniff_image(head: bytes) -> tuple[str, int, int] | None:
+    """(format, width, height) from the first bytes of a file; None if unknown or not enough bytes yet."""
+    fmt = image_format(head)
+    size = None
+    if fmt == "PNG" and len(head) >= 24 and head[12:16] == b"IHDR":
+        size = struct.unpack(">II", head[16:24])
+    elif fmt == "GIF" and len(head) >= 10:
+        size = struct.unpack("<HH", head[6:10])
+    elif fmt == "BMP" and len(head) >= 26:
+        width, height = struct.unpack("<ii", head[18:26])
+        size = (width, abs(height))
+    elif fmt == "JPEG":
+        size = _jpeg_size(head)
+    if not size:
+        return None
+    return fmt, size[0], size[1]
+
+
+def _check(sniffed: tuple[str, int, int]) -> None:
+    _, width, height = sniffed
+    if width <= 0 or height <= 0:
+        raise ImageRejected(f"Invalid dimensions {width}x{height}")
+    if width * height > IMAGE_MAX_PIXELS:
+        raise ImageRejected(f"Image too large: {width}x{height}")
+
+
+def sidecar_path(path: Path | str) -> Path:
+    return Path(f"{path}.json")
+
+
+def write_sidecar(path: Path | str, meta: ImageMeta) -> None:
+    sidecar_path(path).write_text(json.dumps(asdict(meta)))
+
+
+def _read_sidecar(path: Path) -> ImageMeta | None:
+    try:
+        meta = ImageMeta(**json.loads(sidecar_path(path).read_text()))
+    except (OSError, ValueError, TypeError):
+        return None
+    # A file replaced after ingestion no longer matches its sidecar
+    return meta if meta.bytes == path.stat().st_size else None
+
+
+@functools.lru_cache(maxsize=1024)
+def _scan(path: str, mtime_ns: int, size: int) -> ImageMeta | None:
+    digest = hashlib.sha256()
+    head = b""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+            if len(head) < IMAGE_SNIFF_BYTES:
+                head += chunk
+    sniffed = sniff_image(head)
+    if sniffed is None:
+        return None
+    try:
+        _check(sniffed)
+    except ImageRejected as e:
+        logger.warning("Ignoring %s: %s", path, e)
+        return None
+    return ImageMeta(sniffed[0], sniffed[1], sniffed[2], size, digest.hexdigest())
+
+
+def image_meta(path: Path | str | None) -> ImageMeta | None:
+    """Metadata for a local image: its sidecar, else a header scan (memoised per file version).
+
+    None when the file is missing, empty or not an image we can embed.
+    """
+    if not path:
+        return None
+    path = Path(path)
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    if stat.st_size == 0:
+        return None
+    return _read_sidecar(path) or _scan(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def stream_image(response, dest_folder: Path, max_bytes: int = IMAGE_MAX_BYTES) -> tuple[Path, ImageMeta]:
+    """Write an httpx streaming response to `dest_folder` as a validated image.
+
+    Raises ImageRejected for non-images, bodies over `max_bytes` and images
+    whose header cannot be read or whose size is out of bounds.
+    """
+    declared = response.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise ImageRejected(f"Body of {declared} bytes exceeds {max_bytes}")
+
+    dest_folder.mkdir(parents=True, exist_ok=True)
+    part = dest_folder / f".{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    head = b""
+    sniffed = None
+    total = 0
+    try:
+        with open(part, "wb") as f:
+            for chunk in response.iter_bytes():
+                total += len(chunk)
+                if total > max_bytes:
+                    raise ImageRejected(f"Body exceeds {max_bytes} bytes")
+                if sniffed is None:
+                    head += chunk
+                    if image_format(head[:8]) is None and len(head) >= 8:
+                        raise ImageRejected("Not an image (%r)" % head[:8])
+                    sniffed = sniff_image(head)
+                    if sniffed is None and len(head) >= IMAGE_SNIFF_BYTES:
+                        raise ImageRejected("Image header not found")
+                    if sniffed is not None:
+                        _check(sniffed)
+                        head = b""
+                digest.update(chunk)
+                f.write(chunk)
+        if sniffed is None:
+            raise ImageRejected("Truncated or unrecognised image")
+
+        meta = ImageMeta(sniffed[0], sniffed[1], sniffed[2], total, digest.hexdigest())
+        out = dest_folder / f"{meta.sha256[:32]}.{IMAGE_EXTENSIONS[meta.format]}"
+        # Same content gives the same name, so a racing hedged download is harmless
+        os.replace(part, out)
+        write_sidecar(out, meta)
+        return out, meta
+    finally:
+        part.unlink(missing_ok=True)
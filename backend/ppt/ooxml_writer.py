@@ -0,0 +1,200 @@
+"""
+Direct OOXML writer for title + bullets + picture decks.
+
+Produces the same package as `build_presentation` with python-pptx, but
+without its object model: the fixed parts (theme, master, layouts, ...)
+come from python-pptx's default template, read once per process, and
+slides are emitted from string templates straight into a `zipfile`.
+JPEG/PNG/GIF media is stored without re-deflating and every distinct
+image (by the SHA-256 in its ingestion sidecar) is written once however
+many slides use it.
+"""
+import functools
+import io
+import re
+import shutil
+import uuid
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+
+from ppt.image_ingest import image_meta
+from ppt.ppt_builder import place_picture, resolve_image_path
+from ppt.slide_layouts import Box, get_layout
+from ppt.text_fit import slide_pages
+from ppt.theme_manager import get_theme
+
+# The blank layout render_slide uses (prs.slide_layouts[6])
+BLANK_LAYOUT = "slideLayout7.xml"
+
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_SLIDE_CT = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+# PIL format -> (extension, content type, already compressed)
+_MEDIA_TYPES = {
+    "JPEG": ("jpeg", "image/jpeg", True),
+    "PNG": ("png", "image/png", True),
+    "GIF": ("gif", "image/gif", True),
+    "BMP": ("bmp", "image/bmp", False),
+}
+# Characters XML 1.0 cannot carry; written as _xHHHH_ like python-pptx does
+_INVALID_XML_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_SLIDE_XML = (
+    "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+    '<p:sld xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<p:cSld><p:bg><p:bgPr><a:solidFill><a:srgbClr val="{background}"/></a:solidFill><a:effectLst/></p:bgPr></p:bg>'
+    '<p:spTree><p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr><p:grpSpPr/>'
+    "{shapes}</p:spTree></p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sld>"
+)
+_TEXTBOX_XML = (
+    '<p:sp><p:nvSpPr><p:cNvPr id="{id}" name="TextBox {n}"/><p:cNvSpPr txBox="1"/><p:nvPr/></p:nvSpPr>'
+    '<p:spPr><a:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+    '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom><a:noFill/></p:spPr>'
+    '<p:txBody><a:bodyPr wrap="square"><a:spAutoFit/></a:bodyPr><a:lstStyle/>{paragraphs}</p:txBody></p:sp>'
+)
+_PARAGRAPH_XML = "<a:p><a:pPr>{rpr}</a:pPr><a:r><a:t>{text}</a:t></a:r></a:p>"
+_RPR_XML = '<a:defRPr sz="{sz}" b="{b}"><a:solidFill><a:srgbClr val="{color}"/></a:solidFill><a:latin typeface={font}/></a:defRPr>'
+_PICTURE_XML = (
+    '<p:pic><p:nvPicPr><p:cNvPr id="{id}" name="Picture {n}" descr={descr}/>'
+    '<p:cNvPicPr><a:picLocks noChangeAspect="1"/></p:cNvPicPr><p:nvPr/></p:nvPicPr>'
+    '<p:blipFill><a:blip r:embed="rId2"/><a:stretch><a:fillRect/></a:stretch></p:blipFill>'
+    '<p:spPr><a:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+    '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr></p:pic>'
+)
+_SLIDE_RELS_XML = (
+    "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Id="rId1" Type="{_REL_NS}/slideLayout" Target="../slideLayouts/{BLANK_LAYOUT}"/>'
+    "{image}</Relationships>"
+)
+_IMAGE_REL_XML = f'<Relationship Id="rId2" Type="{_REL_NS}/image" Target="../media/{{target}}"/>'
+
+
+@dataclass(frozen=True)
+class _Skeleton:
+    """Parts of an empty python-pptx deck, split where slides are spliced in."""
+    parts: tuple  # ((name, bytes), ...) copied verbatim
+    presentation: tuple  # (before sldIdLst, after)
+    rels: str  # presentation.xml.rels without its closing tag
+    content_types: str  # [Content_Types].xml without its closing tag
+    next_rid: int
+    slide_w: int
+    slide_h: int
+
+
+@functools.lru_cache(maxsize=1)
+def _skeleton() -> _Skeleton:
+    from pptx import Presentation
+
+    prs = Presentation()
+    buf = io.BytesIO()
+    prs.save(buf)
+    with zipfile.ZipFile(buf) as z:
+        files = {name: z.read(name) for name in z.namelist()}
+
+    presentation = files.pop("ppt/presentation.xml").decode("utf-8")
+    marker = "</p:sldMasterIdLst>"
+    head, tail = presentation.split(marker, 1)
+    rels = files.pop("ppt/_rels/presentation.xml.rels").decode("utf-8")
+    rids = [int(n) for n in re.findall(r'Id="rId(\d+)"', rels)]
+    content_types = files.pop("[Content_Types].xml").decode("utf-8")
+
+    return _Skeleton(
+        parts=tuple(files.items()),
+        presentation=(head + marker, tail),
+        rels=rels.replace("</Relationships>", ""),
+        content_types=content_types.replace("</Types>", ""),
+        next_rid=max(rids) + 1,
+        slide_w=prs.slide_width,
+        slide_h=prs.slide_height,
+    )
+
+
+def _text(value) -> str:
+    return escape(_INVALID_XML_RE.sub(lambda m: f"_x{ord(m.group()):04X}_", str(value)))
+
+
+def _textbox(shape_id: int, box: Box, lines, rpr: str) -> str:
+    paragraphs = "".join(_PARAGRAPH_XML.format(rpr=rpr, text=_text(line)) for line in lines) or "<a:p/>"
+    return _TEXTBOX_XML.format(
+        id=shape_id, n=shape_id - 1, x=box.left, y=box.top, cx=box.width, cy=box.height, paragraphs=paragraphs
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _run_properties(size_pt: int, bold: bool, color: str, font: str) -> str:
+    return _RPR_XML.format(sz=size_pt * 100, b=int(bold), color=color, font=quoteattr(font))
+
+
+def write_presentation(slides: list[dict], out_path: Path | str, style: str | None = None) -> Path:
+    """Fast-path equivalent of `build_presentation` (same arguments and result)."""
+    sk = _skeleton()
+    theme = get_theme(style)
+    layout = get_layout(theme.layout, sk.slide_w, sk.slide_h)
+    tmp_dir = Path("output") / "images" / f"ppt_builder_{uuid.uuid4().hex}"
+
+    out = Path(out_path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    media: dict[str, str] = {}  # sha256 -> media file name
+    media_exts: dict[str, str] = {}  # extension -> content type
+    slide_ids, slide_rels, overrides = [], [], []
+
+    n = 0
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for s in slides:
+            image_path = resolve_image_path(s, tmp_dir)
+            picture = place_picture(layout, image_path)
+            # Format and hash come from the ingestion sidecar (or one header scan)
+            meta = image_meta(image_path) if picture else None
+
+            for page in slide_pages(s, theme, layout, meta is not None):
+                n += 1
+                title_rpr = _run_properties(page.title.size, True, str(theme.title_color), theme.title_font)
+                body_rpr = _run_properties(page.body.size, False, str(theme.body_color), theme.body_font)
+                shapes = [
+                    _textbox(2, layout.title, [page.title_text], title_rpr),
+                    _textbox(3, page.body_box, page.bullets, body_rpr),
+                ]
+                image_rel = ""
+                if page.picture:
+                    ext, content_type, compressed = _MEDIA_TYPES[meta.format]
+                    digest = meta.sha256
+                    if digest not in media:
+                        media[digest] = f"image{len(media) + 1}.{ext}"
+                        media_exts[ext] = content_type
+                        info = zipfile.ZipInfo(f"ppt/media/{media[digest]}")
+                        info.compress_type = zipfile.ZIP_STORED if compressed else zipfile.ZIP_DEFLATED
+                        with open(image_path, "rb") as src, zf.open(info, "w") as dst:
+                            shutil.copyfileobj(src, dst, 1 << 16)
+                    shapes.append(_PICTURE_XML.format(
+                        id=4, n=3, descr=quoteattr(Path(image_path).name),
+                        x=picture.left, y=picture.top, cx=picture.width, cy=picture.height,
+                    ))
+                    image_rel = _IMAGE_REL_XML.format(target=media[digest])
+
+                zf.writestr(f"ppt/slides/slide{n}.xml", _SLIDE_XML.format(background=str(theme.background), shapes="".join(shapes)))
+                zf.writestr(f"ppt/slides/_rels/slide{n}.xml.rels", _SLIDE_RELS_XML.format(image=image_rel))
+
+                rid = f"rId{sk.next_rid + n - 1}"
+                slide_ids.append(f'<p:sldId id="{255 + n}" r:id="{rid}"/>')
+                slide_rels.append(f'<Relationship Id="{rid}" Type="{_REL_NS}/slide" Target="slides/slide{n}.xml"/>')
+                overrides.append(f'<Override PartName="/ppt/slides/slide{n}.xml" ContentType="{_SLIDE_CT}"/>')
+
+        head, tail = sk.presentation
+        sld_id_lst = f"<p:sldIdLst>{''.join(slide_ids)}</p:sldIdLst>" if slide_ids else ""
+        zf.writestr("ppt/presentation.xml", head + sld_id_lst + tail)
+        zf.writestr("ppt/_rels/presentation.xml.rels", sk.rels + "".join(slide_rels) + "</Relationships>")
+        defaults = "".join(
+            f'<Default Extension="{ext}" ContentType="{ct}"/>'
+            for ext, ct in sorted(media_exts.items())
+            if f'Extension="{ext}"' not in sk.content_types
+        )
+        zf.writestr("[Content_Types].xml", sk.content_types + defaults + "".join(overrides) + "</Types>")
+        for name, data in sk.parts:
+            zf.writestr(name, data)
+
+    return out
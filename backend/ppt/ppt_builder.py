@@ -1,179 +1,182 @@
 import logging
+import os
 from pathlib import Path
+from urllib.parse import urlparse
 import httpx
 from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.dml.color import RGBColor
+from pptx.util import Pt
 import uuid
 
+from ppt.image_ingest import ImageRejected, image_meta, stream_image
+from ppt.slide_layouts import SLIDE_H, SLIDE_W, Box, SlideLayout, fit_image, get_layout
+from ppt.text_fit import slide_pages
+from ppt.theme_manager import Theme, get_theme
+from utils.resilience import resilient_call_sync
+
 logger = logging.getLogger(__name__)
 
+# Image CDNs have no request budget, so a hedged second attempt is cheap
+DOWNLOAD_HEDGE = os.getenv("DOWNLOAD_HEDGE", "true").lower() in ("1", "true", "yes")
+# "pptx" renders through python-pptx; "ooxml" writes the package directly (see ooxml_writer.py)
+PPT_WRITER = os.getenv("PPT_WRITER", "pptx").lower()
+PPT_WRITERS = ("pptx", "ooxml")
+
+
+def _fetch(url: str, dest_folder: Path, timeout: int) -> Path | None:
+	with httpx.Client(timeout=timeout) as client, client.stream("GET", url) as r:
+		# Server errors count against the host's breaker
+		if r.status_code >= 500:
+			r.raise_for_status()
+		if r.status_code != 200:
+			logger.warning("Image download failed %s status=%s", url, r.status_code)
+			return None
+		try:
+			path, _ = stream_image(r, dest_folder)
+		except ImageRejected as e:
+			# A bad payload is not the host failing
+			logger.warning("Image rejected %s: %s", url, e)
+			return None
+	return path
+
 
 def download_image(url: str, dest_folder: Path, timeout: int = 10) -> Path | None:
-	"""Download image to dest_folder and return file path, or None on failure."""
+	"""Download image to dest_folder and return file path, or None on failure.
+
+	The body is validated while it streams (see image_ingest) and stored
+	with a metadata sidecar. Local library images (an existing file path)
+	are used in place.
+	"""
+	if url and isinstance(url, str) and not url.startswith(("http://", "https://")) and Path(url).is_file():
+		return Path(url)
+
 	if not url or not isinstance(url, str) or not url.startswith(("http://", "https://")):
 		logger.warning("Invalid image URL, skipping download: %s", url)
 		return None
 
 	try:
-		dest_folder.mkdir(parents=True, exist_ok=True)
-		fname = url.split("/")[-1].split("?")[0]
-		if not fname.lower().endswith((".jpg", ".jpeg", ".png")):
-			fname = fname + ".jpg"
-		out = dest_folder / fname
-		with httpx.Client(timeout=timeout) as client:
-			r = client.get(url)
-			if r.status_code == 200 and r.content:
-				out.write_bytes(r.content)
-				return out
-			else:
-				logger.warning("Image download failed %s status=%s", url, r.status_code)
-				return None
+		return resilient_call_sync(f"images:{urlparse(url).netloc}", lambda: _fetch(url, dest_folder, timeout), hedge=DOWNLOAD_HEDGE)
 	except Exception as e:
 		logger.warning("Image download exception %s: %s", url, e)
 		return None
 
 
-def _apply_gamma_theme(prs: Presentation):
-	"""Apply a simple dark Gamma-like theme to the Presentation.
-
-	- Dark background
-	- Bold white titles
-	- Muted gray bullets
-	"""
-	# Attempt to set slide background for existing slides (new slides will get style from here)
-	for slide in prs.slides:
-		try:
-			fill = slide.background.fill
-			fill.solid()
-			fill.fore_color.rgb = RGBColor(18, 18, 18)  # very dark gray
-		except Exception:
-			continue
-
-
-def build_presentation(slides: list[dict], out_path: Path | str) -> Path:
-    """Create PPTX with title, bullets, and images below text, fully working."""
-    prs = Presentation()
-    tmp_dir = Path("output") / "images" / f"ppt_builder_{uuid.uuid4().hex}"
+def _set_background(slide, theme: Theme) -> None:
+    try:
+        fill = slide.background.fill
+        fill.solid()
+        fill.fore_color.rgb = theme.background
+    except Exception:
+        pass
+
+
+def _add_text(slide, box: Box, lines: list[str], font: str, size, color, bold: bool = False) -> None:
+    shape = slide.shapes.add_textbox(box.left, box.top, box.width, box.height)
+    tf = shape.text_frame
+    tf.clear()
+    tf.word_wrap = True
+    for idx, line in enumerate(lines):
+        p = tf.paragraphs[0] if idx == 0 else tf.add_paragraph()
+        p.text = line
+        p.level = 0
+        p.font.name = font
+        p.font.size = size
+        p.font.bold = bold
+        p.font.color.rgb = color
+
+
+def resolve_image_path(s: dict, tmp_dir: Path) -> str | None:
+    """Local file for the slide's picture: its stored `image_path`, else a download of `image_url`."""
+    image_path = s.get("image_path")
+    if image_path and Path(image_path).exists():
+        return image_path
+    image_url = s.get("image_url")
+    if image_url:
+        try:
+            _downloaded = download_image(image_url, tmp_dir)
+            return str(_downloaded) if _downloaded else None
+        except Exception:
+            return None
+    return None
+
+
+def place_picture(layout: SlideLayout, image_path: str | None) -> Box | None:
+    """Where the picture goes in `layout`, or None when there is no usable image."""
+    if not image_path:
+        return None
+    meta = image_meta(image_path)
+    if meta is None:
+        logger.warning("Image file missing, empty or not an image: %s", image_path)
+        return None
+    return fit_image(layout.image, meta.width, meta.height, align=layout.image_align)
+
+
+def deck_pages(slides: list[dict], style: str | None = None) -> list[int]:
+    """Deck slides each stored spec renders to; more than one when its bullets continue on "(cont.)" slides."""
+    theme = get_theme(style)
+    layout = get_layout(theme.layout, SLIDE_W, SLIDE_H)
+    return [len(slide_pages(s, theme, layout, place_picture(layout, s.get("image_path")) is not None)) for s in slides]
+
+
+def render_slide(prs: Presentation, s: dict, tmp_dir: Path, theme: Theme | None = None) -> int:
+    """Append a slide spec (title, bullets, image) to `prs` using `theme` and its layout.
+
+    Font sizes come from the text-fit engine; bullets that do not fit even
+    at its minimum size continue on extra slides. Returns the number of
+    slides added. Slides are rendered independently of each other, so a
+    deck can be rebuilt from stored slide specs where only the edited slide
+    needs new inputs.
+    """
+    theme = theme or get_theme()
+    layout = get_layout(theme.layout, prs.slide_width, prs.slide_height)
     blank_layout = prs.slide_layouts[6] if len(prs.slide_layouts) > 6 else prs.slide_layouts[-1]
 
-    left_margin = Inches(0.5)
-    right_margin = Inches(0.5)
-    bottom_margin = Inches(0.5)
-    top_margin = Inches(0.3)
-    slide_w = prs.slide_width
-    slide_h = prs.slide_height
+    image_path = resolve_image_path(s, tmp_dir)
+    picture = place_picture(layout, image_path)
+    pages = slide_pages(s, theme, layout, picture is not None)
 
-    for s in slides:
-        title = s.get("title", "Untitled")
-        bullets = s.get("bullets", [])[:4]
-
-        # --- Image fetch (working logic from commented version) ---
-        image_path = s.get("image_path")
-        if not image_path:
-            image_url = s.get("image_url")
-            if image_url:
-                try:
-                    _downloaded = download_image(image_url, tmp_dir)
-                    image_path = str(_downloaded) if _downloaded else None
-                except Exception:
-                    image_path = None
-
-        # --- Add slide ---
+    for page in pages:
         slide = prs.slides.add_slide(blank_layout)
+        _set_background(slide, theme)
 
-        # Dark background
         try:
-            fill = slide.background.fill
-            fill.solid()
-            fill.fore_color.rgb = RGBColor(18, 18, 18)
-        except Exception:
-            pass
-
-        # --- Title ---
-        title_height = Inches(1.0)
-        try:
-            title_box = slide.shapes.add_textbox(left_margin, top_margin,
-													slide_w - left_margin - right_margin,
-													title_height)
-            tf = title_box.text_frame
-            tf.clear()
-            p = tf.paragraphs[0]
-            p.text = title
-            p.font.bold = True
-            p.font.size = Pt(28)
-            p.font.color.rgb = RGBColor(255, 255, 255)
+            _add_text(slide, layout.title, [page.title_text], theme.title_font, Pt(page.title.size), theme.title_color, bold=True)
         except Exception:
             logger.debug("Failed to add title box")
 
-        # --- Bullets ---
-        body_top = top_margin + title_height + Inches(0.2)
-        body_height = Inches(3.0)
         try:
-            body_box = slide.shapes.add_textbox(left_margin, body_top,
-												slide_w - left_margin - right_margin,
-												body_height)
-            tf = body_box.text_frame
-            tf.clear()
-            for idx, b in enumerate(bullets):
-                p = tf.paragraphs[0] if idx == 0 else tf.add_paragraph()
-                p.text = b
-                p.level = 0
-                p.font.size = Pt(16)
-                p.font.color.rgb = RGBColor(200, 200, 200)
+            _add_text(slide, page.body_box, list(page.bullets), theme.body_font, Pt(page.body.size), theme.body_color)
         except Exception:
             logger.debug("Failed to add bullets")
 
-        # --- Image below text (fully working from commented version) ---
-        if image_path:
+        if page.picture:
             try:
-                img_file = Path(image_path)
-                if img_file.exists() and img_file.stat().st_size > 0:
-                    from PIL import Image
-
-                    with Image.open(img_file) as im:
-                        orig_w, orig_h = im.size
-
-                    aspect_ratio = orig_w / orig_h
-
-                    # Max image height = 1/4 slide
-                    max_height = slide_h * 0.25
-                    pic_height = max_height
-                    pic_width = pic_height * aspect_ratio
-
-                    # Fit width if needed
-                    max_width = slide_w - left_margin - right_margin
-                    if pic_width > max_width:
-                        pic_width = max_width
-                        pic_height = pic_width / aspect_ratio
-
-                    # Center horizontally
-                    pic_left = (slide_w - pic_width) / 2
-
-                    # Place below bullets
-                    pic_top = body_top + body_height + Inches(0.2)
-
-                    # 🔑 Clamp vertically so image NEVER goes off-slide
-                    max_bottom = slide_h - bottom_margin
-                    if pic_top + pic_height > max_bottom:
-                        pic_height = max_bottom - pic_top
-                        pic_width = pic_height * aspect_ratio
-                        pic_left = (slide_w - pic_width) / 2
-
-                    # Final safety check
-                    if pic_height > 0 and pic_width > 0:
-                        slide.shapes.add_picture(
-                            str(img_file),
-                            pic_left,
-                            pic_top,
-                            width=int(pic_width),
-                            height=int(pic_height),
-                        )
-                else:
-                    logger.warning("Image file missing or empty: %s", image_path)
+                slide.shapes.add_picture(str(image_path), picture.left, picture.top, width=picture.width, height=picture.height)
             except Exception as e:
                 logger.warning("Embedding image failed: %s", e)
+    return len(pages)
+
+
+def build_presentation(slides: list[dict], out_path: Path | str, style: str | None = None, writer: str | None = None) -> Path:
+    """Create PPTX with title, bullets and images in the given style (see theme_manager).
 
+    Slides that already carry a local `image_path` are embedded as-is; only
+    slides with just an `image_url` trigger a download. `writer` overrides
+    PPT_WRITER for this call.
+    """
+    writer = (writer or PPT_WRITER).lower()
+    if writer not in PPT_WRITERS:
+        raise ValueError(f"Unknown PPT writer: {writer}")
+    if writer == "ooxml":
+        from ppt.ooxml_writer import write_presentation
+
+        return write_presentation(slides, out_path, style)
+
+    prs = Presentation()
+    tmp_dir = Path("output") / "images" / f"ppt_builder_{uuid.uuid4().hex}"
+    theme = get_theme(style)
+
+    for s in slides:
+        render_slide(prs, s, tmp_dir, theme)
 
     # Save PPT
     out = Path(out_path)
@@ -189,8 +192,9 @@ class PPTBuilder:
 	    builder.build(slide_agent_output)
 	"""
 
-	def __init__(self, output_path: str | Path):
+	def __init__(self, output_path: str | Path, style: str | None = None):
 		self.output_path = Path(output_path)
+		self.style = style
 
 	def build(self, slide_agent_output: dict | list) -> Path:
 		# Accept either a dict with `slides` key or a direct list
@@ -201,4 +205,4 @@ class PPTBuilder:
 		# Defensive: ensure slides is a list of dict
 		if not isinstance(slides, list):
 			raise ValueError("Invalid slides input for PPTBuilder")
-		return build_presentation(slides, self.output_path)
\ No newline at end of file
+		return build_presentation(slides, self.output_path, self.style)
\ No newline at end of file
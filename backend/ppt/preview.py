@@ -0,0 +1,110 @@
+"""
+Slide preview thumbnails.
+
+`render_preview` draws a slide spec (title, bullets, picture) with PIL in
+the theme's colours and layout geometry, scaled to a small image. Previews
+are cached on disk under a hash of everything that affects the pixels, so
+an unchanged slide is only ever drawn once.
+"""
+import io
+import logging
+import os
+import uuid
+from pathlib import Path
+
+from agents.executor.memo import content_hash
+from ppt.image_ingest import image_meta
+from ppt.slide_layouts import SLIDE_H, SLIDE_W, Box, fit_image, get_layout
+from ppt.text_fit import EMU_PER_PT, INSET_X_PT, INSET_Y_PT, LINE_SPACING, load_font, slide_pages
+from ppt.theme_manager import THEME_SPECS, get_theme, resolve_style
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_CACHE_DIR = Path(os.getenv("PREVIEW_CACHE_DIR", "./output/previews"))
+PREVIEW_WIDTH = int(os.getenv("PREVIEW_WIDTH", 480))
+PREVIEW_MAX_WIDTH = 1280
+PREVIEW_FORMATS = {"png": "image/png", "webp": "image/webp"}
+# Bump when drawing changes so old cache entries are not served
+PREVIEW_VERSION = 2
+
+
+def _scale(box: Box, k: float) -> tuple[int, int, int, int]:
+    return int(box.left * k), int(box.top * k), int(box.width * k), int(box.height * k)
+
+
+def _draw_text(draw, box: Box, k: float, fit, font, color: str) -> None:
+    """Draw lines already wrapped by the text-fit engine; scaling keeps the breaks valid."""
+    left, top, width, height = _scale(box, k)
+    line_h = fit.size * LINE_SPACING * EMU_PER_PT * k
+    y = top + INSET_Y_PT * EMU_PER_PT * k
+    x = left + INSET_X_PT * EMU_PER_PT * k
+    for paragraph in fit.lines:
+        for line in paragraph:
+            if y + line_h > top + height + 1:
+                return
+            draw.text((x, y), line, font=font, fill=color)
+            y += line_h
+
+
+def preview_key(slide: dict, style: str | None, width: int, fmt: str) -> str:
+    """Cache key: slide text, image content, theme and output size/format."""
+    meta = image_meta(slide.get("image_path"))
+    return content_hash(
+        "preview", PREVIEW_VERSION, resolve_style(style), width, fmt,
+        slide.get("title", "Untitled"), slide.get("bullets", []),
+        meta.sha256 if meta else None,
+    )
+
+
+def render_preview(slide: dict, style: str | None = None, width: int = PREVIEW_WIDTH, fmt: str = "png") -> bytes:
+    """Draw one slide spec as an image `width` pixels wide; returns the encoded bytes."""
+    from PIL import Image, ImageDraw
+
+    theme = get_theme(style)
+    spec = THEME_SPECS[theme.name]
+    layout = get_layout(theme.layout, SLIDE_W, SLIDE_H)
+    k = width / SLIDE_W
+    height = round(SLIDE_H * k)
+    # Point sizes scale with the slide
+    px_per_pt = EMU_PER_PT * k
+
+    canvas = Image.new("RGB", (width, height), f"#{spec['background']}")
+    draw = ImageDraw.Draw(canvas)
+
+    image_path = slide.get("image_path")
+    meta = image_meta(image_path)
+    picture = fit_image(layout.image, meta.width, meta.height, layout.image_align) if meta else None
+    if picture:
+        left, top, w, h = _scale(picture, k)
+        try:
+            with Image.open(image_path) as im:
+                # JPEG can decode straight at a reduced scale
+                im.draft("RGB", (w, h))
+                canvas.paste(im.convert("RGB").resize((max(w, 1), max(h, 1))), (left, top))
+        except Exception as e:
+            logger.warning("Preview could not draw image %s: %s", image_path, e)
+            picture = None
+
+    # The first page of the slide as the deck shows it (continuations are not previewed)
+    page = slide_pages(slide, theme, layout, picture is not None)[0]
+    title_font = load_font(theme.title_font, max(int(page.title.size * px_per_pt), 6), bold=True)
+    body_font = load_font(theme.body_font, max(int(page.body.size * px_per_pt), 6))
+    _draw_text(draw, layout.title, k, page.title, title_font, f"#{spec['title_color']}")
+    _draw_text(draw, page.body_box, k, page.body, body_font, f"#{spec['body_color']}")
+
+    buf = io.BytesIO()
+    canvas.save(buf, format=fmt.upper())
+    return buf.getvalue()
+
+
+def get_preview(slide: dict, style: str | None = None, width: int = PREVIEW_WIDTH, fmt: str = "png") -> tuple[Path, str]:
+    """Cached preview file for a slide spec and its cache key (usable as an ETag)."""
+    key = preview_key(slide, style, width, fmt)
+    path = PREVIEW_CACHE_DIR / key[:2] / f"{key}.{fmt}"
+    if not path.exists():
+        data = render_preview(slide, style, width, fmt)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        part = path.with_name(f".{uuid.uuid4().hex}.part")
+        part.write_bytes(data)
+        os.replace(part, path)
+    return path, key
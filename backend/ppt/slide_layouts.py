@@ -0,0 +1,91 @@
+"""
+Slide geometry declared as data.
+
+Boxes are (left, top, width, height) as fractions of the slide size, so a
+layout works for any slide dimensions. `get_layout` compiles a layout
+for one slide size into EMU integers once; rendering then only reads
+them. `body_no_image` is used when a slide has no picture.
+"""
+import functools
+from dataclasses import dataclass
+
+DEFAULT_LAYOUT = "stacked"
+# The default python-pptx slide (10in x 7.5in), in EMU; every writer uses it
+SLIDE_W, SLIDE_H = 9144000, 6858000
+
+LAYOUT_SPECS: dict[str, dict] = {
+    # Title, bullets, picture centred underneath (at most a quarter of the slide high)
+    "stacked": {
+        "title": (0.05, 0.04, 0.90, 0.133),
+        "body": (0.05, 0.20, 0.90, 0.40),
+        "body_no_image": (0.05, 0.20, 0.90, 0.40),
+        "image": (0.05, 0.627, 0.90, 0.25),
+        "image_align": "top",
+    },
+    # Bullets left, picture right
+    "split_right": {
+        "title": (0.05, 0.04, 0.90, 0.133),
+        "body": (0.05, 0.20, 0.50, 0.72),
+        "body_no_image": (0.05, 0.20, 0.90, 0.72),
+        "image": (0.58, 0.20, 0.37, 0.72),
+        "image_align": "center",
+    },
+    # Picture left, bullets right
+    "split_left": {
+        "title": (0.05, 0.04, 0.90, 0.133),
+        "body": (0.45, 0.20, 0.50, 0.72),
+        "body_no_image": (0.05, 0.20, 0.90, 0.72),
+        "image": (0.05, 0.20, 0.37, 0.72),
+        "image_align": "center",
+    },
+}
+
+
+@dataclass(frozen=True)
+class Box:
+    left: int
+    top: int
+    width: int
+    height: int
+
+
+@dataclass(frozen=True)
+class SlideLayout:
+    name: str
+    title: Box
+    body: Box
+    body_no_image: Box
+    image: Box
+    image_align: str
+
+
+def _box(fractions: tuple, slide_w: int, slide_h: int) -> Box:
+    x, y, w, h = fractions
+    return Box(int(x * slide_w), int(y * slide_h), int(w * slide_w), int(h * slide_h))
+
+
+@functools.lru_cache(maxsize=None)
+def get_layout(name: str, slide_w: int, slide_h: int) -> SlideLayout:
+    """Layout `name` (unknown names give DEFAULT_LAYOUT) in EMU for one slide size."""
+    if name not in LAYOUT_SPECS:
+        name = DEFAULT_LAYOUT
+    spec = LAYOUT_SPECS[name]
+    return SlideLayout(
+        name=name,
+        title=_box(spec["title"], slide_w, slide_h),
+        body=_box(spec["body"], slide_w, slide_h),
+        body_no_image=_box(spec["body_no_image"], slide_w, slide_h),
+        image=_box(spec["image"], slide_w, slide_h),
+        image_align=spec["image_align"],
+    )
+
+
+def fit_image(slot: Box, img_w: int, img_h: int, align: str = "top") -> Box | None:
+    """Largest box with the image's aspect ratio inside `slot`, centred horizontally."""
+    if img_w <= 0 or img_h <= 0 or slot.width <= 0 or slot.height <= 0:
+        return None
+    scale = min(slot.width / img_w, slot.height / img_h)
+    width, height = int(img_w * scale), int(img_h * scale)
+    left = slot.left + (slot.width - width) // 2
+    top = slot.top if align == "top" else slot.top + (slot.height - height) // 2
+    return Box(left, top, width, height)
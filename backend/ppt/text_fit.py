@@ -0,0 +1,150 @@
+"""
+Text fitting for slide text boxes.
+
+Text is measured with PIL font metrics: each (font, size, word) width is
+measured once per process and lines are assembled from those, so wrapping
+a paragraph costs dictionary lookups. `fit_text` picks the largest font
+size (theme size down to a floor) at which wrapped text fits its box, and
+`paginate_slide` moves bullets that do not fit even at the floor onto
+continuation slides. Results are memoised on the text, so rebuilding a
+deck after a one-slide edit only fits that slide again.
+"""
+import functools
+import os
+from dataclasses import dataclass
+
+from ppt.slide_layouts import Box, SlideLayout
+from ppt.theme_manager import Theme
+
+TEXT_FIT_MIN_BODY_PT = int(os.getenv("TEXT_FIT_MIN_BODY_PT", 12))
+TEXT_FIT_MIN_TITLE_PT = int(os.getenv("TEXT_FIT_MIN_TITLE_PT", 18))
+TEXT_FIT_CACHE_SIZE = int(os.getenv("TEXT_FIT_CACHE_SIZE", 4096))
+
+EMU_PER_PT = 12700
+# python-pptx text box insets (0.1in left/right, 0.05in top/bottom)
+INSET_X_PT, INSET_Y_PT = 7.2, 3.6
+# Single line spacing in PowerPoint is about 1.2x the font size
+LINE_SPACING = 1.2
+CONTINUED_SUFFIX = " (cont.)"
+
+# Fallbacks when a theme font is not installed
+_FALLBACK_FONTS = {False: "DejaVuSans.ttf", True: "DejaVuSans-Bold.ttf"}
+
+
+@functools.lru_cache(maxsize=128)
+def load_font(family: str, px: int, bold: bool = False):
+    """PIL font for a theme font family at `px` pixels, falling back to DejaVu then PIL's default."""
+    from PIL import ImageFont
+
+    candidates = [f"{family}{' Bold' if bold else ''}.ttf", f"{family.replace(' ', '')}.ttf", _FALLBACK_FONTS[bold]]
+    for name in candidates:
+        try:
+            return ImageFont.truetype(name, px)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=px)
+
+
+@functools.lru_cache(maxsize=65536)
+def run_width(family: str, size: int, bold: bool, run: str) -> float:
+    """Width in points of a glyph run set at `size` points (measured as `size` px)."""
+    return load_font(family, size, bold).getlength(run)
+
+
+def wrap(text: str, family: str, size: int, bold: bool, width_pt: float) -> list[str]:
+    """Greedy word wrap; a word wider than the line is broken by characters."""
+    space = run_width(family, size, bold, " ")
+    lines, line, line_w = [], [], 0.0
+    for word in text.split():
+        word_w = run_width(family, size, bold, word)
+        if word_w > width_pt:
+            if line:
+                lines.append(" ".join(line))
+            pieces, piece = [], ""
+            for ch in word:
+                if piece and run_width(family, size, bold, piece + ch) > width_pt:
+                    pieces.append(piece)
+                    piece = ""
+                piece += ch
+            lines.extend(pieces)
+            line, line_w = [piece], run_width(family, size, bold, piece)
+            continue
+        needed = word_w + (space if line else 0)
+        if line and line_w + needed > width_pt:
+            lines.append(" ".join(line))
+            line, line_w = [word], word_w
+        else:
+            line.append(word)
+            line_w += needed
+    if line:
+        lines.append(" ".join(line))
+    return lines or [""]
+
+
+@dataclass(frozen=True)
+class TextFit:
+    size: int  # points
+    lines: tuple  # wrapped lines, one tuple per paragraph
+    fits: bool
+
+
+def _inner(box: Box) -> tuple[float, float]:
+    return box.width / EMU_PER_PT - 2 * INSET_X_PT, box.height / EMU_PER_PT - 2 * INSET_Y_PT
+
+
+@functools.lru_cache(maxsize=TEXT_FIT_CACHE_SIZE)
+def fit_text(paragraphs: tuple, family: str, bold: bool, max_pt: int, min_pt: int, box: Box) -> TextFit:
+    """Largest size in [min_pt, max_pt] at which `paragraphs` wrap inside `box`; at min_pt `fits` may be False."""
+    width, height = _inner(box)
+    size = max_pt
+    while True:
+        lines = tuple(tuple(wrap(p, family, size, bold, width)) for p in paragraphs)
+        used = sum(len(p) for p in lines) * size * LINE_SPACING
+        if used <= height or size <= min_pt:
+            return TextFit(size, lines, used <= height)
+        size -= 1
+
+
+@dataclass(frozen=True)
+class SlidePage:
+    """One rendered slide: a slide spec's title and (part of) its bullets, fitted."""
+    title: TextFit
+    body: TextFit
+    title_text: str
+    bullets: tuple
+    body_box: Box
+    picture: bool  # only the first page of a slide carries its picture
+
+
+def _fit_body(bullets: tuple, theme: Theme, box: Box) -> TextFit:
+    body_pt = int(theme.body_size.pt)
+    return fit_text(bullets, theme.body_font, False, body_pt, min(TEXT_FIT_MIN_BODY_PT, body_pt), box)
+
+
+@functools.lru_cache(maxsize=TEXT_FIT_CACHE_SIZE)
+def paginate_slide(title: str, bullets: tuple, theme: Theme, layout: SlideLayout, picture: bool) -> tuple:
+    """Fitted pages for one slide spec; more than one when the bullets overflow at the minimum size."""
+    title_pt = int(theme.title_size.pt)
+    pages = []
+    remaining = bullets
+    while True:
+        first = not pages
+        box = layout.body if (first and picture) else layout.body_no_image
+        page_title = title if first else title + CONTINUED_SUFFIX
+        body = _fit_body(remaining, theme, box)
+        take = len(remaining)
+        # Shrink the chunk until it fits; a single bullet always gets its own page
+        while not body.fits and take > 1:
+            take -= 1
+            body = _fit_body(remaining[:take], theme, box)
+        title_fit = fit_text((page_title,), theme.title_font, True, title_pt, min(TEXT_FIT_MIN_TITLE_PT, title_pt), layout.title)
+        pages.append(SlidePage(title_fit, body, page_title, remaining[:take], box, first and picture))
+        remaining = remaining[take:]
+        if not remaining:
+            return tuple(pages)
+
+
+def slide_pages(s: dict, theme: Theme, layout: SlideLayout, picture: bool) -> tuple:
+    """`paginate_slide` for a slide spec dict."""
+    bullets = tuple(str(b) for b in (s.get("bullets") or []) if str(b).strip())
+    return paginate_slide(str(s.get("title") or "Untitled"), bullets, theme, layout, picture)
@@ -0,0 +1,111 @@
+"""
+Presentation themes declared as data.
+
+A theme names its colours (hex), fonts and sizes, and the slide layout
+(see slide_layouts.py) it uses. `get_theme` compiles a declaration once
+into an immutable `Theme` holding ready-made python-pptx values, so
+rendering a slide only reads attributes. Adding a style is adding an
+entry to THEME_SPECS.
+"""
+import functools
+from dataclasses import dataclass
+from typing import Any
+
+DEFAULT_STYLE = "professional"
+
+THEME_SPECS: dict[str, dict] = {
+    # The original dark deck look
+    "professional": {
+        "background": "121212",
+        "title_color": "FFFFFF",
+        "body_color": "C8C8C8",
+        "title_font": "Calibri",
+        "body_font": "Calibri",
+        "title_size": 28,
+        "body_size": 16,
+        "layout": "stacked",
+    },
+    "creative": {
+        "background": "2B1055",
+        "title_color": "FFD166",
+        "body_color": "F1E9FF",
+        "title_font": "Georgia",
+        "body_font": "Trebuchet MS",
+        "title_size": 32,
+        "body_size": 17,
+        "layout": "split_left",
+    },
+    "minimal": {
+        "background": "FFFFFF",
+        "title_color": "111111",
+        "body_color": "444444",
+        "title_font": "Helvetica",
+        "body_font": "Helvetica",
+        "title_size": 26,
+        "body_size": 15,
+        "layout": "stacked",
+    },
+    "modern": {
+        "background": "0F172A",
+        "title_color": "38BDF8",
+        "body_color": "E2E8F0",
+        "title_font": "Segoe UI",
+        "body_font": "Segoe UI",
+        "title_size": 30,
+        "body_size": 16,
+        "layout": "split_right",
+    },
+    "academic": {
+        "background": "FBF8F1",
+        "title_color": "1F3A5F",
+        "body_color": "2E2E2E",
+        "title_font": "Times New Roman",
+        "body_font": "Georgia",
+        "title_size": 28,
+        "body_size": 15,
+        "layout": "split_right",
+    },
+}
+
+THEME_NAMES = tuple(THEME_SPECS)
+
+
+@dataclass(frozen=True)
+class Theme:
+    name: str
+    background: Any
+    title_color: Any
+    body_color: Any
+    title_font: str
+    body_font: str
+    title_size: Any
+    body_size: Any
+    layout: str
+
+
+def resolve_style(style: str | None) -> str:
+    """Known style name for `style` (case-insensitive); unknown or empty gives the default."""
+    name = (style or "").strip().lower()
+    return name if name in THEME_SPECS else DEFAULT_STYLE
+
+
+@functools.lru_cache(maxsize=None)
+def get_theme(style: str | None = None) -> Theme:
+    # python-pptx is imported here, not at module load, so the API can
+    # validate style names without paying for it at startup
+    from pptx.dml.color import RGBColor
+    from pptx.util import Pt
+
+    name = resolve_style(style)
+    spec = THEME_SPECS[name]
+    return Theme(
+        name=name,
+        background=RGBColor.from_string(spec["background"]),
+        title_color=RGBColor.from_string(spec["title_color"]),
+        body_color=RGBColor.from_string(spec["body_color"]),
+        title_font=spec["title_font"],
+        body_font=spec["body_font"],
+        title_size=Pt(spec["title_size"]),
+        body_size=Pt(spec["body_size"]),
+        layout=spec["layout"],
+    )
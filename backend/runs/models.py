@@ -0,0 +1,22 @@
+import uuid
+from sqlalchemy import Column, String, Integer, Text, JSON, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from utils.database import Base
+
+class Run(Base):
+    __tablename__ = "runs"
+
+    id = Column(String, primary_key=True, default=lambda: uuid.uuid4().hex)
+    user_id = Column(String, ForeignKey("users.id"), index=True, nullable=False)
+    goal = Column(String, nullable=False)
+    num_slides = Column(Integer, nullable=False)
+    research = Column(Text, nullable=True)
+    # Rendered slide specs: title, bullets, image_url, image_path
+    slides = Column(JSON, nullable=False, default=list)
+    output_file = Column(String, nullable=True)
+    # Theme the deck was rendered with; edits re-render in the same style
+    style = Column(String, nullable=True)
+    # Planner settings the deck ran with (tier's content mode, image sources); edits reuse them
+    settings = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
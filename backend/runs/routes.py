@@ -0,0 +1,80 @@
+import os
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from utils.dependencies import get_db
+from utils.responses import pptx_response
+from auth.dependencies import get_current_user
+from auth.cache import AuthUser
+from .schemas import SlideEditRequest, RunResponse
+from ppt.preview import PREVIEW_FORMATS, PREVIEW_MAX_WIDTH, PREVIEW_WIDTH
+from .service import get_run, edit_slide, slide_preview
+
+router = APIRouter(prefix="/runs", tags=["Runs"])
+
+# --------------------------
+# Run details
+# --------------------------
+@router.get("/{run_id}", response_model=RunResponse)
+async def read_run(run_id: str, db: AsyncSession = Depends(get_db), user: AuthUser = Depends(get_current_user)):
+    return await get_run(db, run_id, user.id)
+
+
+# --------------------------
+# Download the current PPTX
+# --------------------------
+@router.get("/{run_id}/download")
+async def download_run(run_id: str, db: AsyncSession = Depends(get_db), user: AuthUser = Depends(get_current_user)):
+    run = await get_run(db, run_id, user.id)
+    if not run.output_file or not os.path.exists(run.output_file):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Presentation file is no longer available")
+    return pptx_response(run.output_file, run.id)
+
+
+# --------------------------
+# Edit one slide
+# --------------------------
+@router.patch("/{run_id}/slides/{slide_no}")
+async def patch_slide(
+    run_id: str,
+    slide_no: int,
+    data: SlideEditRequest,
+    db: AsyncSession = Depends(get_db),
+    user: AuthUser = Depends(get_current_user),
+):
+    """
+    Regenerate a single slide and return the re-rendered PPTX.
+    Only that slide's content and image are recomputed. `slide_no` counts
+    slide specs (see `SlideOut`), not PPTX slides.
+    """
+    run = await get_run(db, run_id, user.id)
+    run = await edit_slide(db, run, slide_no, data)
+    return pptx_response(run.output_file, run.id)
+
+
+# --------------------------
+# Slide preview
+# --------------------------
+@router.get("/{run_id}/slides/{slide_no}/preview")
+async def preview_slide(
+    run_id: str,
+    slide_no: int,
+    width: int = Query(PREVIEW_WIDTH, ge=64, le=PREVIEW_MAX_WIDTH),
+    format: Literal["png", "webp"] = "png",
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_db),
+    user: AuthUser = Depends(get_current_user),
+):
+    """
+    Small image of one slide, drawn from its stored spec in the run's style
+    (its first page when it continues on extra PPTX slides). The ETag is the slide's content hash, so unchanged slides revalidate with 304.
+    """
+    run = await get_run(db, run_id, user.id)
+    path, key = await slide_preview(run, slide_no, width, format)
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=300"}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=PREVIEW_FORMATS[format], headers=headers)
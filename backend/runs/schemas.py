@@ -0,0 +1,58 @@
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+
+class SlideEditRequest(BaseModel):
+    """
+    Edit of a single slide.
+
+    Explicit `title`/`bullets` are applied as-is. When neither is given (or
+    `instructions` is set) the slide content is regenerated by the LLM.
+    """
+    title: Optional[str] = None
+    bullets: Optional[List[str]] = None
+    instructions: Optional[str] = None
+    regenerate_image: bool = True
+
+
+class SlideOut(BaseModel):
+    """
+    One slide spec. The API numbers specs (`/runs/{id}/slides/{n}` is the
+    n-th entry of `RunResponse.slides`); a spec whose bullets overflow
+    renders to `pages` consecutive slides in the PPTX, starting at
+    `deck_slide`.
+    """
+    title: str
+    bullets: List[str]
+    image_url: Optional[str] = None
+    pages: int = 1
+    deck_slide: int = 1
+
+    @field_validator("image_url")
+    @classmethod
+    def _public_url(cls, value: Optional[str]) -> Optional[str]:
+        # Local-library images are stored as server file paths; never expose those
+        if value and not value.startswith(("http://", "https://")):
+            return None
+        return value
+
+
+class RunResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    goal: str
+    num_slides: int
+    style: Optional[str] = None
+    slides: List[SlideOut] = Field(default_factory=list)
+    # Slides in the downloaded PPTX (continuation slides included)
+    deck_slides: int = 0
+
+    @model_validator(mode="after")
+    def _number_deck_slides(self) -> "RunResponse":
+        position = 1
+        for slide in self.slides:
+            slide.deck_slide = position
+            position += slide.pages
+        self.deck_slides = position - 1
+        return self
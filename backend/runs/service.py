@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import uuid
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+
+from utils.quota import Priority, quota_priority
+
+from .models import Run
+from .schemas import SlideEditRequest
+
+logger = logging.getLogger(__name__)
+
+
+async def _with_pages(slides: list[dict], style: str | None) -> list[dict]:
+    """Slide specs annotated with `pages`: how many deck slides each one rendered to."""
+    from ppt.ppt_builder import deck_pages
+
+    pages = await asyncio.to_thread(deck_pages, slides, style)
+    return [{**s, "pages": n} for s, n in zip(slides, pages)]
+
+
+async def save_run(db: AsyncSession, user_id: str, goal: str, num_slides: int, final_state: dict, output_file: str, slides: list[dict]) -> Run:
+    """Persist what a later slide edit needs: goal, research, settings and the rendered slide specs."""
+    research = final_state.get("research_agent")
+    slides = await _with_pages(slides, final_state.get("style"))
+    run = Run(
+        user_id=user_id,
+        goal=goal,
+        num_slides=num_slides,
+        research=research if isinstance(research, str) else None,
+        slides=slides,
+        output_file=output_file,
+        style=final_state.get("style"),
+        settings=final_state.get("settings"),
+    )
+    db.add(run)
+    await db.commit()
+    # Load server defaults (timestamps) now; lazy loads are not allowed under asyncio
+    await db.refresh(run)
+    return run
+
+
+async def get_run(db: AsyncSession, run_id: str, user_id: str) -> Run:
+    run = (await db.execute(select(Run).where(Run.id == run_id, Run.user_id == user_id))).scalar_one_or_none()
+    if not run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Run not found"
+        )
+    return run
+
+
+def _get_slide(slides: list[dict], slide_no: int) -> dict:
+    if not 1 <= slide_no <= len(slides):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Slide {slide_no} not found (run has {len(slides)} slides)"
+        )
+    return slides[slide_no - 1]
+
+
+async def slide_preview(run: Run, slide_no: int, width: int, fmt: str) -> tuple[Path, str]:
+    """Thumbnail of one stored slide in the run's style; drawn once per distinct slide content."""
+    from ppt.preview import get_preview
+
+    slide = _get_slide(run.slides or [], slide_no)
+    return await asyncio.to_thread(get_preview, slide, run.style, width, fmt)
+
+
+async def edit_slide(db: AsyncSession, run: Run, slide_no: int, edit: SlideEditRequest) -> Run:
+    """
+    Re-run only the work affected by one slide: its content, its image
+    lookup/download and the final render. Every other slide is reused as stored.
+    Content and image go through the node memo under the run's own settings
+    (image sources), so repeating an edit costs no LLM or Unsplash call.
+    """
+    # Agent and pptx imports are heavy; pay for them on the first edit, not at startup
+    from agents.executor.content_agent import generate_slide_content
+    from agents.executor.image_agent import resolve_slide_image
+    from agents.executor.memo import node_memo
+    from agents.executor.slide_agent import slide_text
+    from ppt.ppt_builder import build_presentation, download_image
+
+    slides = [dict(s) for s in (run.slides or [])]
+    slide = _get_slide(slides, slide_no)
+    old_text = slide_text(slide)
+    settings = run.settings or {}
+
+    # Edits are interactive: their LLM and image calls outrank deck generation for quota
+    with quota_priority(Priority.HIGH):
+        # 1. Content
+        if edit.title is not None:
+            slide["title"] = edit.title.strip() or slide.get("title")
+        if edit.bullets is not None:
+            slide["bullets"] = [b.strip() for b in edit.bullets if b.strip()]
+        if edit.instructions or (edit.title is None and edit.bullets is None):
+            title = slide.get("title", "")
+            key = node_memo.key("content_agent:slide", run.goal, settings, run.research, slide_text(slide), edit.instructions)
+            slide.update(await node_memo.compute(
+                key, lambda: generate_slide_content(run.goal, title, run.research or "", edit.instructions)
+            ))
+
+        # 2. Image: only when asked, and only for this slide
+        if edit.regenerate_image:
+            text, sources = slide_text(slide), settings.get("image_sources")
+            # Keyed on the image being replaced too, so asking again for the same slide gives a new one
+            key = node_memo.key("image_agent:slide", run.goal, settings, text, slide.get("image_url"))
+            image_url = await node_memo.compute(key, lambda: resolve_slide_image(text, run.goal, sources))
+            image_path = None
+            if image_url:
+                tmp_dir = Path("output") / "images" / run.id
+                image_path = await asyncio.to_thread(download_image, image_url, tmp_dir)
+            slide["image_url"] = image_url
+            slide["image_path"] = str(image_path) if image_path else None
+        elif slide_text(slide) != old_text:
+            logger.debug("Slide %s text changed but image kept as requested", slide_no)
+
+    slides[slide_no - 1] = slide
+
+    # 3. Re-render; unchanged slides embed their already-downloaded images
+    out_dir = Path("output") / "presentations"
+    out_path = out_dir / f"presentation_{uuid.uuid4().hex}.pptx"
+    await asyncio.to_thread(build_presentation, slides, out_path, run.style)
+
+    # Reassign (not mutate) so SQLAlchemy notices the JSON change
+    run.slides = await _with_pages(slides, run.style)
+    run.output_file = str(out_path)
+    await db.commit()
+    await db.refresh(run)
+    return run
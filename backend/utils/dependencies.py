@@ -1,10 +1,10 @@
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from utils.database import SessionLocal
-from sqlalchemy.orm import Session
-from fastapi import Depends
 
-def get_db():
-    db = SessionLocal()
-    try:
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
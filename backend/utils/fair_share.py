@@ -0,0 +1,209 @@
+"""
+Per-user fair admission for generation runs.
+
+At most FAIR_MAX_RUNS runs execute at once in a process and each user has
+at most FAIR_USER_MAX_INFLIGHT of them. Further runs wait in a per-user
+queue; when a slot frees up it is handed out by deficit round-robin over
+the users with queued work, where a run costs its slide count. A user
+firing many large decks therefore gets the same share of slots as one
+asking for a single small deck, and cannot push that user's wait up.
+
+Users with FAIR_USER_MAX_QUEUED runs already waiting, and runs that wait
+longer than FAIR_QUEUE_TIMEOUT, get 429 with a Retry-After estimate.
+
+Usage:
+
+    async with fair_scheduler.admit(user.id, cost=num_slides):
+        ...plan and execute...
+"""
+import asyncio
+import collections
+import contextlib
+import logging
+import math
+import os
+import time
+import weakref
+
+from fastapi import HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+FAIR_MAX_RUNS = int(os.getenv("FAIR_MAX_RUNS", 4))
+FAIR_USER_MAX_INFLIGHT = int(os.getenv("FAIR_USER_MAX_INFLIGHT", 2))
+FAIR_USER_MAX_QUEUED = int(os.getenv("FAIR_USER_MAX_QUEUED", 4))
+FAIR_QUEUE_TIMEOUT = float(os.getenv("FAIR_QUEUE_TIMEOUT", 60))
+# Credit a user gains per round; one full-size (14-slide) deck
+FAIR_QUANTUM = 14
+# Prior for the Retry-After estimate until runs have been timed
+DEFAULT_RUN_SECONDS = 30.0
+
+
+class _UserQueue:
+    def __init__(self):
+        self.waiters: collections.deque = collections.deque()  # (cost, future)
+        self.inflight = 0
+        self.deficit = 0.0
+
+
+class _LoopState:
+    def __init__(self):
+        self.active = 0
+        self.users: dict[str, _UserQueue] = {}
+        # Users with queued runs, in round-robin order
+        self.ring: collections.deque = collections.deque()
+
+
+class FairScheduler:
+    def __init__(
+        self,
+        max_runs: int = FAIR_MAX_RUNS,
+        user_max_inflight: int = FAIR_USER_MAX_INFLIGHT,
+        user_max_queued: int = FAIR_USER_MAX_QUEUED,
+        queue_timeout: float = FAIR_QUEUE_TIMEOUT,
+        quantum: float = FAIR_QUANTUM,
+    ):
+        self.max_runs = max_runs
+        self.user_max_inflight = user_max_inflight
+        self.user_max_queued = user_max_queued
+        self.queue_timeout = queue_timeout
+        self.quantum = quantum
+        self.run_seconds = DEFAULT_RUN_SECONDS  # EWMA of admitted run durations
+        self.rejected = 0
+        # asyncio futures are loop-bound, so keep one state per event loop
+        self._states: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _state(self) -> _LoopState:
+        return self._states.setdefault(asyncio.get_running_loop(), _LoopState())
+
+    def _user(self, state: _LoopState, user_id: str) -> _UserQueue:
+        return state.users.setdefault(user_id, _UserQueue())
+
+    def retry_after(self, user_id: str) -> int:
+        """Seconds until `user_id` can expect a slot: its queue drained at its in-flight cap."""
+        queue = self._state().users.get(user_id)
+        ahead = (len(queue.waiters) + queue.inflight) if queue else 0
+        return max(1, math.ceil(self.run_seconds * (ahead + 1) / max(self.user_max_inflight, 1)))
+
+    def _reject(self, user_id: str, reason: str) -> HTTPException:
+        self.rejected += 1
+        retry_after = self.retry_after(user_id)
+        logger.info("Rejecting run for user %s: %s (retry after %ss)", user_id, reason, retry_after)
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many presentations in progress: {reason}",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    @contextlib.asynccontextmanager
+    async def admit(self, user_id: str, cost: float = 1):
+        state = self._state()
+        queue = self._user(state, user_id)
+        if not state.ring and state.active < self.max_runs and queue.inflight < self.user_max_inflight:
+            state.active += 1
+            queue.inflight += 1
+        else:
+            if len(queue.waiters) >= self.user_max_queued:
+                raise self._reject(user_id, "queue full")
+            waiter = asyncio.get_running_loop().create_future()
+            queue.waiters.append((cost, waiter))
+            if user_id not in state.ring:
+                state.ring.append(user_id)
+            # Free slots may be held back only for users at their cap
+            self._dispatch(state)
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if waiter.done() and not waiter.cancelled():
+                    # Granted in the same tick: give the slot back
+                    self._release(state, user_id)
+                else:
+                    waiter.cancel()
+                    self._drop(state, user_id, waiter)
+                if isinstance(e, asyncio.TimeoutError):
+                    raise self._reject(user_id, "timed out in queue") from None
+                raise
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.run_seconds = 0.8 * self.run_seconds + 0.2 * (time.monotonic() - started)
+            self._release(state, user_id)
+
+    def _drop(self, state: _LoopState, user_id: str, waiter) -> None:
+        queue = state.users.get(user_id)
+        if queue is None:
+            return
+        queue.waiters = collections.deque((c, w) for c, w in queue.waiters if w is not waiter)
+        if not queue.waiters:
+            self._retire(state, user_id)
+
+    def _retire(self, state: _LoopState, user_id: str) -> None:
+        """Take a user with nothing queued out of the round (DRR resets its credit)."""
+        queue = state.users[user_id]
+        queue.deficit = 0.0
+        with contextlib.suppress(ValueError):
+            state.ring.remove(user_id)
+        if not queue.inflight:
+            del state.users[user_id]
+
+    def _release(self, state: _LoopState, user_id: str) -> None:
+        state.active -= 1
+        queue = state.users.get(user_id)
+        if queue is not None:
+            queue.inflight -= 1
+            if not queue.inflight and not queue.waiters:
+                del state.users[user_id]
+        self._dispatch(state)
+
+    def _dispatch(self, state: _LoopState) -> None:
+        """Deficit round-robin: grant free slots to queued runs of users under their cap."""
+        idle_passes = 0
+        while state.active < self.max_runs and state.ring and idle_passes <= len(state.ring):
+            user_id = state.ring[0]
+            queue = state.users[user_id]
+            # Cancelled waiters leave the queue lazily
+            while queue.waiters and queue.waiters[0][1].done():
+                queue.waiters.popleft()
+            if not queue.waiters:
+                self._retire(state, user_id)
+                continue
+            cost, waiter = queue.waiters[0]
+            if queue.inflight >= self.user_max_inflight:
+                state.ring.rotate(-1)
+                idle_passes += 1
+                continue
+            if queue.deficit < cost:
+                queue.deficit += self.quantum
+                if queue.deficit < cost:
+                    state.ring.rotate(-1)
+                    continue
+            queue.waiters.popleft()
+            queue.deficit -= cost
+            queue.inflight += 1
+            state.active += 1
+            waiter.set_result(None)
+            idle_passes = 0
+            if not queue.waiters:
+                self._retire(state, user_id)
+            else:
+                # One grant per turn keeps interleaving fair
+                state.ring.rotate(-1)
+
+    def snapshot(self) -> dict:
+        try:
+            state = self._state()
+        except RuntimeError:
+            return {"max_runs": self.max_runs}
+        return {
+            "max_runs": self.max_runs,
+            "active": state.active,
+            "queued": sum(len(q.waiters) for q in state.users.values()),
+            "users": len(state.users),
+            "rejected": self.rejected,
+            "run_seconds": round(self.run_seconds, 2),
+        }
+
+
+fair_scheduler = FairScheduler()
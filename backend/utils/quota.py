@@ -0,0 +1,307 @@
+"""
+Upstream quota manager.
+
+Token buckets per provider live in a small SQLite file so every uvicorn
+worker on the host draws from the same budget. On top of that each process
+runs an AIMD concurrency limiter per provider that halves on 429s or
+latency spikes (per token for single calls, time to first token for
+streams) and creeps back up on success.
+
+Usage:
+
+    async with quota.lease("openai", tokens=estimate) as lease:
+        ...call...
+        if response_was_throttled:
+            lease.throttled()
+"""
+import asyncio
+import contextlib
+import contextvars
+import enum
+import logging
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+
+from utils.resilience import is_failure
+
+logger = logging.getLogger(__name__)
+
+QUOTA_DB_PATH = os.getenv("QUOTA_DB_PATH", "./quota.db")
+# Give up (and let the caller fall back) after waiting this long for budget
+QUOTA_MAX_WAIT = float(os.getenv("QUOTA_MAX_WAIT", 30))
+
+
+class Priority(enum.IntEnum):
+    HIGH = 0    # interactive edits
+    NORMAL = 1  # regular deck generation
+    LOW = 2     # background / bulk work
+
+
+# Share of each bucket a priority class must leave untouched for higher classes
+PRIORITY_RESERVE = {
+    Priority.HIGH: 0.0,
+    Priority.NORMAL: 0.1,
+    Priority.LOW: 0.5,
+}
+
+# Priority of the current request; propagates into tasks it creates
+current_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar("quota_priority", default=Priority.NORMAL)
+
+
+class QuotaExceeded(RuntimeError):
+    """Budget did not free up within QUOTA_MAX_WAIT."""
+
+
+def counts_as_failure(exc: Exception) -> bool:
+    """Breaker verdict for calls made under a lease: running out of local budget is not the endpoint failing."""
+    return not isinstance(exc, QuotaExceeded) and is_failure(exc)
+
+
+@dataclass(frozen=True)
+class BucketSpec:
+    name: str
+    capacity: float
+    per_seconds: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.per_seconds
+
+
+@dataclass(frozen=True)
+class ProviderSpec:
+    requests: BucketSpec
+    tokens: BucketSpec | None = None
+    max_concurrency: int = 8
+
+
+PROVIDERS = {
+    "openai": ProviderSpec(
+        requests=BucketSpec("openai:requests", float(os.getenv("OPENAI_RPM", 500)), 60),
+        tokens=BucketSpec("openai:tokens", float(os.getenv("OPENAI_TPM", 200000)), 60),
+        max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", 16)),
+    ),
+    "unsplash": ProviderSpec(
+        requests=BucketSpec("unsplash:requests", float(os.getenv("UNSPLASH_RPH", 50)), 3600),
+        max_concurrency=int(os.getenv("UNSPLASH_MAX_CONCURRENCY", 4)),
+    ),
+}
+
+
+class BucketStore:
+    """Token buckets persisted in SQLite; updates are serialised with BEGIN IMMEDIATE."""
+
+    def __init__(self, path: str = QUOTA_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+            self._local.conn = conn
+        return conn
+
+    def take(self, demands: list[tuple[BucketSpec, float]], reserve: float) -> float:
+        """
+        Atomically take `cost` from every bucket, or nothing at all.
+        Returns 0 on success, otherwise the seconds to wait before retrying.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            levels = {}
+            wait = 0.0
+            for spec, cost in demands:
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (spec.name,)).fetchone()
+                tokens, updated = row if row else (spec.capacity, now)
+                level = min(spec.capacity, tokens + (now - updated) * spec.rate)
+                levels[spec.name] = level
+                # Never ask for more than the bucket can hold, or we would wait forever
+                needed = min(cost, spec.capacity) + reserve * spec.capacity
+                if level < needed:
+                    wait = max(wait, (needed - level) / spec.rate)
+
+            for spec, cost in demands:
+                level = levels[spec.name] if wait else levels[spec.name] - cost
+                conn.execute(
+                    "INSERT INTO buckets (name, tokens, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                    (spec.name, level, now),
+                )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def refund(self, spec: BucketSpec, amount: float) -> None:
+        """Give back over-estimated tokens."""
+        conn = self._conn()
+        conn.execute(
+            "UPDATE buckets SET tokens = MIN(?, tokens + ?) WHERE name = ?",
+            (spec.capacity, amount, spec.name),
+        )
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for one provider in this process: +1/limit per
+    success, halved on throttling or on a latency spike.
+
+    Latency is only compared like for like: one EWMA per kind ("call":
+    seconds per token of the request, "stream": time to first token), and
+    a spike is a sample above LATENCY_SPIKE x its kind's EWMA once that
+    has MIN_SAMPLES behind it and the call took over LATENCY_FLOOR
+    seconds. Long completions and whole streams therefore never look like
+    spikes next to short calls.
+    """
+
+    LATENCY_SPIKE = 3.0
+    LATENCY_FLOOR = 1.0
+    MIN_SAMPLES = 10
+
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.latency_ewma: dict[str, float] = {}
+        self.samples: dict[str, int] = {}
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, throttled: bool, kind: str = "call", seconds: float | None = None, units: float = 1.0) -> None:
+        """`seconds` (None when there is no comparable sample) is divided by `units` before comparing."""
+        async with self._cond:
+            self.in_flight -= 1
+            sample = seconds / max(units, 1.0) if seconds is not None else None
+            ewma = self.latency_ewma.get(kind)
+            spike = (
+                sample is not None
+                and self.samples.get(kind, 0) >= self.MIN_SAMPLES
+                and seconds > self.LATENCY_FLOOR
+                and sample > self.LATENCY_SPIKE * ewma
+            )
+            if throttled or spike:
+                self.limit = max(self.min_limit, self.limit / 2)
+                logger.warning("Backing off: concurrency limit now %.1f (throttled=%s, %s latency=%s)", self.limit, throttled, kind, seconds)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            if not throttled and sample is not None:
+                self.samples[kind] = self.samples.get(kind, 0) + 1
+                self.latency_ewma[kind] = sample if ewma is None else 0.8 * ewma + 0.2 * sample
+            self._cond.notify_all()
+
+
+class Lease:
+    def __init__(self):
+        self.is_throttled = False
+        self.used_tokens = None
+        self.first_token_at = None
+
+    def throttled(self) -> None:
+        """Mark the call as rate limited by the provider (HTTP 429 or equivalent)."""
+        self.is_throttled = True
+
+    def first_token(self) -> None:
+        """Mark the arrival of a stream's first token; later calls are ignored."""
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 429
+
+
+class QuotaManager:
+    def __init__(self, store: BucketStore | None = None, providers: dict = PROVIDERS):
+        self.store = store or BucketStore()
+        self.providers = providers
+        # asyncio primitives are loop-bound, so keep one limiter set per event loop
+        self._limiters: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def limiter(self, provider: str) -> AdaptiveLimiter:
+        limiters = self._limiters.setdefault(asyncio.get_running_loop(), {})
+        if provider not in limiters:
+            limiters[provider] = AdaptiveLimiter(self.providers[provider].max_concurrency)
+        return limiters[provider]
+
+    async def _take(self, spec: ProviderSpec, tokens: float, priority: Priority) -> None:
+        demands = [(spec.requests, 1.0)]
+        if spec.tokens is not None and tokens:
+            demands.append((spec.tokens, tokens))
+        reserve = PRIORITY_RESERVE[priority]
+
+        deadline = time.monotonic() + QUOTA_MAX_WAIT
+        while True:
+            try:
+                wait = await asyncio.to_thread(self.store.take, demands, reserve)
+            except sqlite3.Error as e:
+                # Never block generation because the quota file is unavailable
+                logger.warning("Quota store unavailable, allowing call: %s", e)
+                return
+            if not wait:
+                return
+            if time.monotonic() + wait > deadline:
+                raise QuotaExceeded(f"{spec.requests.name} budget exhausted")
+            await asyncio.sleep(wait)
+
+    @contextlib.asynccontextmanager
+    async def lease(self, provider: str, tokens: float = 0, priority: Priority | None = None, stream: bool = False):
+        """
+        Hold budget and a concurrency slot for one call. Streams keep the
+        slot until they finish, but the limiter only sees their time to
+        first token (see Lease.first_token).
+        """
+        spec = self.providers[provider]
+        priority = current_priority.get() if priority is None else priority
+
+        await self._take(spec, tokens, priority)
+        limiter = self.limiter(provider)
+        await limiter.acquire()
+
+        lease = Lease()
+        started = time.monotonic()
+        try:
+            yield lease
+        except Exception as e:
+            if is_throttle_error(e):
+                lease.throttled()
+            raise
+        finally:
+            if stream:
+                ttft = lease.first_token_at - started if lease.first_token_at is not None else None
+                await limiter.release(lease.is_throttled, "stream", ttft)
+            else:
+                await limiter.release(lease.is_throttled, "call", time.monotonic() - started, lease.used_tokens or tokens or 1)
+            if spec.tokens is not None and lease.used_tokens is not None and lease.used_tokens < tokens:
+                try:
+                    await asyncio.to_thread(self.store.refund, spec.tokens, tokens - lease.used_tokens)
+                except sqlite3.Error:
+                    pass
+
+
+@contextlib.contextmanager
+def quota_priority(priority: Priority):
+    """Run the enclosed work (and tasks it spawns) under `priority`."""
+    token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+quota = QuotaManager()
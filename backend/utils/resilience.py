@@ -0,0 +1,212 @@
+"""
+Circuit breakers and hedged requests for external calls.
+
+Each endpoint gets a breaker that opens after BREAKER_FAILURES consecutive
+failures (slow calls count as failures), rejects calls while open, and
+after BREAKER_RESET seconds lets a single probe through (half-open) to
+decide whether to close again. Only errors that say something about the
+endpoint's health count: by default anything but a 4xx answer (see
+`is_failure`), and callers can pass their own `counts_as_failure`.
+Hedging fires a second attempt once the first has been running longer
+than the endpoint's observed p95 latency and returns whichever finishes
+first.
+
+    result = await resilient_call("unsplash:random", lambda: client.get(...), hedge=True)
+    data = resilient_call_sync("images:example.com", lambda: fetch(url))
+"""
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", 5))
+BREAKER_RESET = float(os.getenv("BREAKER_RESET", 30))
+# Calls slower than this count as failures
+BREAKER_SLOW_CALL = float(os.getenv("BREAKER_SLOW_CALL", 20))
+# Hedge delay used until an endpoint has enough samples for a p95
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", 2))
+HEDGE_MIN_SAMPLES = 20
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """The endpoint's breaker is open; the call was not attempted."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failures: int = BREAKER_FAILURES, reset: float = BREAKER_RESET, slow_call: float = BREAKER_SLOW_CALL):
+        self.name = name
+        self.failure_threshold = failures
+        self.reset_timeout = reset
+        self.slow_call = slow_call
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.latencies: deque = deque(maxlen=200)
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record(self, latency: float, ok: bool) -> None:
+        ok = ok and latency <= self.slow_call
+        with self._lock:
+            if ok:
+                self.latencies.append(latency)
+                if self.state != CLOSED:
+                    logger.info("Circuit %s closed", self.name)
+                self.state = CLOSED
+                self.failures = 0
+                return
+
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning("Circuit %s opened after %d failures", self.name, self.failures)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """An allowed call ended without a verdict (cancelled, or an error that is not a failure); let the next call probe."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def hedge_delay(self) -> float:
+        with self._lock:
+            if len(self.latencies) < HEDGE_MIN_SAMPLES:
+                return HEDGE_DEFAULT_DELAY
+            ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+def is_failure(exc: Exception) -> bool:
+    """Default breaker verdict: timeouts, transport errors and 5xx count; 4xx answers do not."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return not (isinstance(status, int) and 400 <= status < 500)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(name: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+async def _attempt(cb: CircuitBreaker, factory, counts_as_failure):
+    started = time.monotonic()
+    try:
+        result = await factory()
+    except asyncio.CancelledError:
+        # Includes the losing side of a hedge; a half-open probe must not stay claimed
+        cb.release_probe()
+        raise
+    except Exception as e:
+        if counts_as_failure(e):
+            cb.record(time.monotonic() - started, ok=False)
+        else:
+            cb.release_probe()
+        raise
+    cb.record(time.monotonic() - started, ok=True)
+    return result
+
+
+async def resilient_call(endpoint: str, factory, hedge: bool = False, counts_as_failure=is_failure):
+    """
+    Await `factory()` behind the endpoint's breaker. With `hedge`, a second
+    `factory()` starts after the p95 delay; the first success wins and the
+    other attempt is cancelled. Errors for which `counts_as_failure` is
+    false are re-raised without counting against the breaker.
+    """
+    cb = breaker(endpoint)
+    if not cb.allow():
+        raise CircuitOpenError(f"Circuit {endpoint} is open")
+
+    if not hedge or cb.state != CLOSED:
+        return await _attempt(cb, factory, counts_as_failure)
+
+    first = asyncio.ensure_future(_attempt(cb, factory, counts_as_failure))
+    done, _ = await asyncio.wait({first}, timeout=cb.hedge_delay())
+    if done:
+        return first.result()
+
+    second = asyncio.ensure_future(_attempt(cb, factory, counts_as_failure))
+    pending = {first, second}
+    error = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return task.result()
+            error = task.exception()
+    raise error
+
+
+_hedge_pool = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+
+def _attempt_sync(cb: CircuitBreaker, fn, counts_as_failure):
+    started = time.monotonic()
+    try:
+        result = fn()
+    except Exception as e:
+        if counts_as_failure(e):
+            cb.record(time.monotonic() - started, ok=False)
+        else:
+            cb.release_probe()
+        raise
+    cb.record(time.monotonic() - started, ok=True)
+    return result
+
+
+def resilient_call_sync(endpoint: str, fn, hedge: bool = False, counts_as_failure=is_failure):
+    """Blocking counterpart of `resilient_call` for code already running on a worker thread."""
+    cb = breaker(endpoint)
+    if not cb.allow():
+        raise CircuitOpenError(f"Circuit {endpoint} is open")
+
+    if not hedge or cb.state != CLOSED:
+        return _attempt_sync(cb, fn, counts_as_failure)
+
+    first = _hedge_pool.submit(_attempt_sync, cb, fn, counts_as_failure)
+    try:
+        return first.result(timeout=cb.hedge_delay())
+    except concurrent.futures.TimeoutError:
+        pass
+
+    pending = {first, _hedge_pool.submit(_attempt_sync, cb, fn, counts_as_failure)}
+    error = None
+    while pending:
+        done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                # Running threads cannot be interrupted; the loser just finishes in the background
+                for other in pending:
+                    other.cancel()
+                return future.result()
+            error = future.exception()
+    raise error
@@ -0,0 +1,65 @@
+import os
+import zipfile
+from urllib.parse import quote
+from fastapi.responses import FileResponse
+
+PPTX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+
+def pptx_response(output_file: str, run_id: str | None = None) -> FileResponse:
+    """Return a generated PPTX as a download, tagged with its run id when known."""
+    # Explicitly set media type for PPTX and ensure a UTF-8 encoded
+    # `Content-Disposition` header so browsers save the file correctly.
+    filename = os.path.basename(output_file)
+    headers = {
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"
+    }
+    if run_id:
+        headers["X-Run-Id"] = run_id
+
+    return FileResponse(output_file, media_type=PPTX_MEDIA_TYPE, headers=headers)
+
+
+class _Sink:
+    """Write-only buffer; ZipFile falls back to streaming mode since it cannot seek."""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+class ZipStream:
+    """Incrementally built ZIP: each call returns the bytes to send so far.
+
+        stream = ZipStream()
+        yield stream.add_file(path, "deck.pptx")
+        yield stream.close()
+    """
+
+    def __init__(self):
+        self._sink = _Sink()
+        self._zf = zipfile.ZipFile(self._sink, "w")
+
+    def _drain(self) -> bytes:
+        data = b"".join(self._sink.chunks)
+        self._sink.chunks.clear()
+        return data
+
+    def add_file(self, path: str, arcname: str) -> bytes:
+        # PPTX is already a ZIP; deflating it again gains nothing
+        self._zf.write(path, arcname, compress_type=zipfile.ZIP_STORED)
+        return self._drain()
+
+    def add_bytes(self, arcname: str, data: bytes) -> bytes:
+        self._zf.writestr(arcname, data, compress_type=zipfile.ZIP_DEFLATED)
+        return self._drain()
+
+    def close(self) -> bytes:
+        self._zf.close()
+        return self._drain()
@@ -43,11 +43,32 @@ export default function Dashboard() {
   const [generatedPPT, setGeneratedPPT] = useState<GeneratedPPT | null>(null);
   const [error, setError] = useState('');
   const [isDownloading, setIsDownloading] = useState(false);
+  const [previews, setPreviews] = useState<string[]>([]);
+
+  const loadPreviews = async (apiBase: string, runId: string) => {
+    const headers = getAuthHeader();
+    const runRes = await fetch(`${apiBase}/runs/${runId}`, { headers });
+    if (!runRes.ok) return;
+    const run = await runRes.json();
+    // Overflowing slides continue on extra PPTX slides; show what the file really has
+    if (run.deck_slides) {
+      setGeneratedPPT((ppt) => (ppt ? { ...ppt, slides: run.deck_slides } : ppt));
+    }
+    const urls = await Promise.all(
+      (run.slides || []).map(async (_: unknown, i: number) => {
+        const r = await fetch(`${apiBase}/runs/${runId}/slides/${i + 1}/preview?width=320&format=webp`, { headers });
+        return r.ok ? window.URL.createObjectURL(await r.blob()) : '';
+      })
+    );
+    setPreviews(urls.filter(Boolean));
+  };
 
   const handleGenerate = async (e: React.FormEvent) => {
     e.preventDefault();
     setError('');
     setGeneratedPPT(null);
+    previews.forEach((url) => window.URL.revokeObjectURL(url));
+    setPreviews([]);
     
     if (!topic.trim()) {
       setError('Please enter a topic for your presentation');
@@ -72,7 +93,7 @@ export default function Dashboard() {
       const res = await fetch(`${API_BASE}/generate_ppt`, {
         method: 'POST',
         headers,
-        body: JSON.stringify({ prompt: topic.trim(), num_slides: parseInt(slideCount) }),
+        body: JSON.stringify({ prompt: topic.trim(), num_slides: parseInt(slideCount), style }),
       });
 
       if (!res.ok) {
@@ -111,31 +132,10 @@ export default function Dashboard() {
         createdAt: new Date(),
       };
       setGeneratedPPT(ppt);
-      // Heuristic: if returned file is very small, images likely missing — retry via form POST
-      if (blob.size && blob.size < 50_000) {
-        // build form and post to backend with token as query param to trigger full server download
-        try {
-          const API_BASE = (import.meta.env.VITE_API_BASE_URL as string) || 'http://localhost:8000';
-          const token = (getAuthHeader() as any).Authorization?.replace('Bearer ', '') || '';
-          if (token) {
-            const form = document.createElement('form');
-            form.method = 'POST';
-            form.action = `${API_BASE}/generate_ppt?access_token=${encodeURIComponent(token)}`;
-            form.style.display = 'none';
-
-            const input = document.createElement('input');
-            input.type = 'hidden';
-            input.name = 'payload';
-            input.value = JSON.stringify({ prompt: topic.trim(), num_slides: parseInt(slideCount) });
-            form.appendChild(input);
-
-            document.body.appendChild(form);
-            form.submit();
-            form.remove();
-          }
-        } catch (e) {
-          // ignore fallback errors
-        }
+      // Check the result through cheap slide thumbnails instead of regenerating
+      const runId = res.headers.get('x-run-id');
+      if (runId) {
+        loadPreviews(API_BASE, runId).catch(() => setPreviews([]));
       }
     } catch (err: any) {
       setError(err?.message || 'Failed to generate presentation. Please try again.');
@@ -354,6 +354,19 @@ export default function Dashboard() {
                         Your <span className="text-foreground font-medium">{generatedPPT.slides}-slide {generatedPPT.style}</span> presentation about <span className="text-foreground font-medium">"{generatedPPT.topic}"</span> is ready.
                       </p>
                       
+                      {previews.length > 0 && (
+                        <div className="grid grid-cols-2 sm:grid-cols-4 gap-3 mb-6">
+                          {previews.map((url, i) => (
+                            <img
+                              key={url}
+                              src={url}
+                              alt={`Slide ${i + 1} preview`}
+                              className="w-full rounded-lg border border-border"
+                            />
+                          ))}
+                        </div>
+                      )}
+
                       <div className="flex flex-wrap gap-3">
                         <Button 
                           variant="gradient-accent" 